@@ -3,6 +3,7 @@
 
 import argparse
 import json
+import shlex
 import shutil
 import subprocess
 import sys
@@ -10,11 +11,69 @@ import tarfile
 from pathlib import Path
 
 
-def create_archive(docset_path: Path, output_path: Path) -> None:
-    """Create a .tgz archive of the docset."""
+# gzip level for the archive. Level 1 is several times faster than
+# tarfile's default of 9 and only slightly larger.
+DEFAULT_COMPRESS_LEVEL = 1
+
+# Buffer used by tarfile to copy member data (its default is 16 KiB, which
+# costs a read/write syscall pair per 16 KiB of every file)
+ARCHIVE_COPY_BUFSIZE = 2 * 1024 * 1024
+
+# Block size of the tar stream written to pigz
+ARCHIVE_STREAM_BUFSIZE = 1024 * 1024
+
+
+def create_archive(
+    docset_path: Path,
+    output_path: Path,
+    compress_level: int = DEFAULT_COMPRESS_LEVEL,
+) -> None:
+    """Create a .tgz archive of the docset.
+
+    When pigz is installed the tar stream is piped through it so compression
+    runs on all cores; otherwise tarfile's single-threaded gzip is used.
+    """
     print(f"Creating archive: {output_path}")
-    with tarfile.open(output_path, "w:gz") as tar:
-        tar.add(docset_path, arcname=docset_path.name)
+    pigz = shutil.which("pigz")
+    if pigz:
+        # Stream the tar through pigz: tarfile writes 1 MiB blocks into the
+        # pipe, and pigz writes straight to the output file's fd, so no gzip
+        # work happens on the Python side. The pipe keeps its default buffered
+        # writer: tarfile ignores write()'s return value, and a raw pipe may
+        # accept only part of a block.
+        with open(output_path, "wb") as out:
+            proc = subprocess.Popen(
+                [pigz, "-c", f"-{compress_level}"],
+                stdin=subprocess.PIPE,
+                stdout=out,
+            )
+            stdin = proc.stdin
+            assert stdin is not None
+            try:
+                # copybufsize is passed through to TarFile, but typeshed's
+                # open() overloads don't list it
+                with tarfile.open(  # ty: ignore[no-matching-overload]
+                    fileobj=stdin,
+                    mode="w|",
+                    bufsize=ARCHIVE_STREAM_BUFSIZE,
+                    copybufsize=ARCHIVE_COPY_BUFSIZE,
+                ) as tar:
+                    tar.add(docset_path, arcname=docset_path.name)
+            finally:
+                # Always close the pipe so pigz sees EOF and exits
+                stdin.close()
+                returncode = proc.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, proc.args)
+    else:
+        # copybufsize is not in typeshed's open() overloads, as above
+        with tarfile.open(  # ty: ignore[no-matching-overload]
+            output_path,
+            "w:gz",
+            compresslevel=compress_level,
+            copybufsize=ARCHIVE_COPY_BUFSIZE,
+        ) as tar:
+            tar.add(docset_path, arcname=docset_path.name)
     print(f"  Created {output_path} ({output_path.stat().st_size / 1024 / 1024:.1f} MB)")
 
 
@@ -23,6 +82,7 @@ def prepare_contribution(
     contrib_repo: Path,
     docset_name: str,
     version: str,
+    compress_level: int = DEFAULT_COMPRESS_LEVEL,
 ) -> Path:
     """Prepare files for Dash contribution."""
     docset_dir = contrib_repo / "docsets" / docset_name
@@ -30,7 +90,7 @@ def prepare_contribution(
 
     # Create archive
     archive_path = docset_dir / f"{docset_name}.tgz"
-    create_archive(docset_path, archive_path)
+    create_archive(docset_path, archive_path, compress_level)
 
     # Copy icons
     for icon_name in ["icon.png", "icon@2x.png"]:
@@ -89,31 +149,34 @@ poe all
     return docset_dir
 
 
+def run_git_script(commands: list[str], cwd: Path) -> None:
+    """Run a sequence of shell commands in a single bash process.
+
+    Each git invocation would otherwise pay its own Python fork/exec. The
+    tradeoff is error locality: set -e stops at the first failing command,
+    but the raised CalledProcessError only names the script as a whole
+    (git's own error output still shows which step failed).
+    """
+    script = "\n".join(["set -e", *commands])
+    subprocess.run(["bash", "-c", script], cwd=cwd, check=True)
+
+
 def submit_pr(contrib_repo: Path, docset_name: str, version: str) -> None:
     """Create a branch, commit, push, and open a PR."""
     branch_name = f"{docset_name.lower()}-v{version.replace('/', '-')}"
 
-    # Fetch upstream
-    subprocess.run(["git", "fetch", "upstream"], cwd=contrib_repo, check=True)
-
-    # Create branch from upstream/master
-    subprocess.run(
-        ["git", "checkout", "-B", branch_name, "upstream/master"],
-        cwd=contrib_repo,
-        check=True,
-    )
-
-    # Add and commit
-    subprocess.run(["git", "add", f"docsets/{docset_name}"], cwd=contrib_repo, check=True)
-    subprocess.run(
-        ["git", "commit", "-m", f"Add/Update {docset_name} docset to {version}"],
+    # Fetch upstream, create branch from upstream/master, commit and push
+    run_git_script(
+        [
+            shlex.join(["git", "fetch", "upstream"]),
+            shlex.join(["git", "checkout", "-B", branch_name, "upstream/master"]),
+            shlex.join(["git", "add", f"docsets/{docset_name}"]),
+            shlex.join(["git", "commit", "-m", f"Add/Update {docset_name} docset to {version}"]),
+            shlex.join(["git", "push", "-u", "origin", branch_name]),
+        ],
         cwd=contrib_repo,
-        check=True,
     )
 
-    # Push
-    subprocess.run(["git", "push", "-u", "origin", branch_name], cwd=contrib_repo, check=True)
-
     # Create PR
     subprocess.run(
         [
@@ -138,51 +201,44 @@ def update_pr(
     branch_name: str,
     version: str,
     docset_path: Path,
+    compress_level: int = DEFAULT_COMPRESS_LEVEL,
 ) -> None:
     """Update an existing PR branch with new files.
 
     Note: This should be called BEFORE prepare_contribution, as it will
     checkout the branch first, then prepare files on that branch.
     """
-    # Fetch and checkout existing branch
-    subprocess.run(["git", "fetch", "origin"], cwd=contrib_repo, check=True)
-    subprocess.run(
-        ["git", "checkout", branch_name],
-        cwd=contrib_repo,
-        check=True,
-    )
+    docset_files = f"docsets/{docset_name}"
+    commit_message = f"Update {docset_name} docset to {version}"
 
-    # Reset any local changes on this branch (from previous prepare attempts)
-    subprocess.run(
-        ["git", "checkout", "--", f"docsets/{docset_name}"],
-        cwd=contrib_repo,
-        capture_output=True,
-    )
-    subprocess.run(
-        ["git", "clean", "-fd", f"docsets/{docset_name}"],
+    # Fetch and checkout existing branch, then reset any local changes on
+    # this branch (from previous prepare attempts). The resets are allowed
+    # to fail quietly.
+    run_git_script(
+        [
+            shlex.join(["git", "fetch", "origin"]),
+            shlex.join(["git", "checkout", branch_name]),
+            shlex.join(["git", "checkout", "--", docset_files]) + " >/dev/null 2>&1 || true",
+            shlex.join(["git", "clean", "-fd", docset_files]) + " >/dev/null 2>&1 || true",
+        ],
         cwd=contrib_repo,
-        capture_output=True,
     )
 
     # Now prepare files on this branch
-    prepare_contribution(docset_path, contrib_repo, docset_name, version)
+    prepare_contribution(docset_path, contrib_repo, docset_name, version, compress_level)
 
-    # Add and commit
-    subprocess.run(["git", "add", f"docsets/{docset_name}"], cwd=contrib_repo, check=True)
-    result = subprocess.run(
-        ["git", "commit", "--amend", "-m", f"Update {docset_name} docset to {version}"],
+    # Add and amend the commit (or make a regular commit if there is nothing
+    # to amend), then force push to update PR
+    run_git_script(
+        [
+            shlex.join(["git", "add", docset_files]),
+            shlex.join(["git", "commit", "--amend", "-m", commit_message])
+            + " || "
+            + shlex.join(["git", "commit", "-m", commit_message]),
+            shlex.join(["git", "push", "--force-with-lease"]),
+        ],
         cwd=contrib_repo,
     )
-    if result.returncode != 0:
-        # No changes to amend, try regular commit
-        subprocess.run(
-            ["git", "commit", "-m", f"Update {docset_name} docset to {version}"],
-            cwd=contrib_repo,
-            check=True,
-        )
-
-    # Force push to update PR
-    subprocess.run(["git", "push", "--force-with-lease"], cwd=contrib_repo, check=True)
 
 
 def main() -> int:
@@ -209,6 +265,14 @@ def main() -> int:
         default="1.0.0",
         help="Docset version",
     )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        choices=range(10),
+        default=DEFAULT_COMPRESS_LEVEL,
+        metavar="0-9",
+        help=f"gzip compression level for the archive (default: {DEFAULT_COMPRESS_LEVEL})",
+    )
     parser.add_argument(
         "--submit",
         action="store_true",
@@ -242,6 +306,7 @@ def main() -> int:
             args.update,
             args.version,
             args.docset,
+            args.compress_level,
         )
         print("\nPR updated!")
         return 0
@@ -252,6 +317,7 @@ def main() -> int:
         args.contrib_repo,
         args.name,
         args.version,
+        args.compress_level,
     )
     print(f"\nFiles prepared in: {docset_dir}")
 
@@ -0,0 +1,73 @@
+"""Read-once facts about a docset, shared by the validation scripts."""
+
+import functools
+import os
+import plistlib
+import sqlite3
+from pathlib import Path
+
+
+class DocsetInspector:
+    """Lazily gathers and caches what the validators need to know about a docset.
+
+    Each fact is computed on first use and kept, so checks (or validators)
+    sharing an inspector walk Documents, parse Info.plist and open the search
+    index only once.
+    """
+
+    def __init__(self, docset_path: Path) -> None:
+        """Initialize inspector with docset path."""
+        self.docset_path = docset_path
+
+        # Standard paths
+        self.contents_dir = docset_path / "Contents"
+        self.resources_dir = self.contents_dir / "Resources"
+        self.documents_dir = self.resources_dir / "Documents"
+        self.db_path = self.resources_dir / "docSet.dsidx"
+        self.plist_path = self.contents_dir / "Info.plist"
+
+    @functools.cached_property
+    def plist(self) -> dict:
+        """Parsed Info.plist."""
+        with open(self.plist_path, "rb") as f:
+            return plistlib.load(f)
+
+    @functools.cached_property
+    def doc_files(self) -> set[str]:
+        """Every file under Documents, relative and "/"-separated, from a single walk."""
+        base = self.documents_dir
+        return {
+            Path(root, name).relative_to(base).as_posix()
+            for root, _, files in os.walk(base)
+            for name in files
+        }
+
+    @functools.cached_property
+    def html_files(self) -> list[Path]:
+        """All HTML files under Documents."""
+        return [self.documents_dir / path for path in self.doc_files if path.endswith(".html")]
+
+    @functools.cached_property
+    def db(self) -> sqlite3.Connection:
+        """Read-only connection to the search index.
+
+        The connection has a file_exists(path) SQL function that strips any
+        anchor from an index path and looks it up in doc_files.
+        """
+        db = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        db.executescript(
+            "PRAGMA query_only = ON;"
+            "PRAGMA temp_store = MEMORY;"
+            "PRAGMA cache_size = -65536;"
+        )
+        db.create_function("file_exists", 1, self._file_exists, deterministic=True)
+        return db
+
+    def _file_exists(self, path: str | None) -> bool:
+        return path is not None and path.split("#", 1)[0] in self.doc_files
+
+    def close(self) -> None:
+        """Close the search index connection if one was opened."""
+        db = self.__dict__.pop("db", None)
+        if db is not None:
+            db.close()
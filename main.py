@@ -15,6 +15,17 @@ from raycast_docset.builder import build_docset
 from raycast_docset.scraper import scrape_raycast_docs
 
 
+def _positive_int(value: str) -> int:
+    """Argparse type for a count that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Generate a Dash docset for Raycast developer documentation",
@@ -64,6 +75,21 @@ Examples:
         help="Directory to cache scraped docs (default: .cache/raycast-docs)",
     )
 
+    parser.add_argument(
+        "--no-assets",
+        dest="download_assets",
+        action="store_false",
+        help="Only scrape the HTML pages, skipping CSS, JS, images and fonts",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=_positive_int,
+        metavar="N",
+        help="Number of worker processes for HTML processing (default: CPU count)",
+    )
+
     args = parser.parse_args()
 
     # Validate arguments
@@ -87,7 +113,7 @@ Examples:
             print("=" * 60)
             print()
 
-            scrape_raycast_docs(output_dir=args.cache_dir)
+            scrape_raycast_docs(output_dir=args.cache_dir, download_assets=args.download_assets)
 
             # Create a docset structure with the scraped docs
             source_path = args.cache_dir / "Raycast.docset"
@@ -156,6 +182,7 @@ Examples:
             source_docset_path=source,
             output_dir=args.output,
             docset_name=args.name,
+            jobs=args.jobs,
         )
 
         print()
@@ -1,18 +1,27 @@
 """Docset builder - creates the Dash docset structure and SQLite index."""
 
+import functools
+import hashlib
+import html
+import os
 import re
 import shutil
 import sqlite3
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from email.utils import formatdate
 from io import BytesIO
 from pathlib import Path
-from typing import Iterator
-from urllib.parse import quote
+from string import ascii_letters, digits
+from typing import Iterable, Iterator
+from urllib.parse import quote_from_bytes
 
 import requests
-from bs4 import BeautifulSoup
-from PIL import Image
+from lxml import etree
+from lxml import html as lxml_html
 
-from .parsers import ALL_PARSERS, IndexEntry
+from . import jsonio
+from .parsers import HTML_PARSER, IndexEntry, index_file, index_tree
 
 
 # Info.plist template for the docset
@@ -42,6 +51,90 @@ INFO_PLIST_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
 </plist>
 """
 
+# Raycast logo from their website
+ICON_URL = "https://www.raycast.com/favicon-production.png"
+
+# Seconds a cached icon is used before it is revalidated with the server
+ICON_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+# Source files whose code determines a processed page and its index entries.
+# Their contents are mixed into every page digest, so changing the code
+# invalidates pages cached by the old version.
+_PAGE_PROCESSING_SOURCES = (Path(__file__), Path(__file__).with_name("parsers.py"))
+
+# Site chrome stripped from every page; Dash provides its own navigation
+_NAVIGATION_TAGS = frozenset({"header", "nav", "aside"})
+
+# Headings that never get a TOC entry
+_SKIP_TOC_HEADINGS = frozenset({"see also", "example", "examples"})
+# Longer headings can't be skipped, so they are never lowercased
+_MAX_SKIP_TOC_HEADING_LEN = max(map(len, _SKIP_TOC_HEADINGS))
+
+# Injected into every page to fix scroll margin when navigating via TOC
+_TOC_SCROLL_CSS = """
+                h1:has(.dashAnchor), h2:has(.dashAnchor), h3:has(.dashAnchor) {
+                    scroll-margin-top: 80px !important;
+                }
+            """
+
+# Characters quote() never escapes; names made only of these need no encoding
+_UNRESERVED_BYTES = (ascii_letters + digits + "_.-~").encode()
+
+# Byte-level anchor injection for pages that need no navigation stripping.
+# Pages with <template> also take the tree path, which anchors the headings
+# lxml parses inside it.
+_TREE_ONLY_TAG_RE = re.compile(rb"<(?:header|nav|aside|template)\b", re.IGNORECASE)
+# Comments and elements whose content lxml parses as text are matched first,
+# so headings inside them are left alone
+_HEADING_RE = re.compile(
+    rb"<!--.*?-->"
+    rb"|<(script|style|title|textarea|xmp)\b.*?</\1\s*>"
+    rb"|<(h[123])\b([^>]*)>(.*?)</\2\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+# A non-empty id attribute, quoted either way or unquoted
+_HEADING_ID_RE = re.compile(rb"""(?:^|\s)id\s*=\s*(?:"[^"]+"|'[^']+'|[^\s>"']+)""", re.IGNORECASE)
+_TAG_RE = re.compile(rb"<[^>]*>")
+_HEAD_CLOSE_RE = re.compile(rb"</head\s*>", re.IGNORECASE)
+
+# Page noise stripped by _fix_paths, fused into a single pass:
+# - analytics scripts (Google Tag Manager, Google Analytics)
+# - GitBook cookie consent and tracking scripts
+# - inline scripts that reference cookies/consent
+# - any elements with cookie-related classes
+_SCRIPT_NOISE_RE = re.compile(
+    rb"<script[^>]*(?:googletagmanager|google-analytics|gitbook)[^>]*>.*?</script>"
+    rb"|<script[^>]*>[^<]*cookie[^<]*</script>"
+    rb'|<div[^>]*class="[^"]*cookie[^"]*"[^>]*>.*?</div>',
+    re.DOTALL | re.IGNORECASE,
+)
+_GITBOOK_PRECONNECT_RE = re.compile(
+    rb'<link[^>]*href="https://static-2v\.gitbook\.com"[^>]*/?>', re.IGNORECASE
+)
+_GITBOOK_STATIC_HREF_RE = re.compile(
+    rb'href="https://static-2v\.gitbook\.com/([^"]+)"', re.IGNORECASE
+)
+_FONTAWESOME_RE = re.compile(rb"<[^>]*ka-p\.fontawesome\.com[^>]*>", re.IGNORECASE)
+# GitBook image proxy URLs are dynamic and won't work offline.
+# Matches src, srcset, href, content, etc.
+_GITBOOK_IMAGE_ATTR_RE = re.compile(
+    rb'\s+(src|srcset|href|content)="[^"]*~gitbook/image[^"]*"\s*', re.IGNORECASE
+)
+# Match any URL containing ~gitbook/image up to common terminators
+_GITBOOK_IMAGE_URL_RE = re.compile(
+    rb"[^\"'<>\s,\[\]]*~gitbook/image[^\"'<>\s,\[\]]*", re.IGNORECASE
+)
+_ORPHAN_SRCSET_RE = re.compile(rb' (image)?srcset="\s*(\d+w\s*,?\s*)+"\s*', re.IGNORECASE)
+
+# External font references stripped from GitBook CSS by _fix_css_fonts
+_CSS_GITBOOK_FONT_FACE_RE = re.compile(
+    r'@font-face\s*\{[^}]*url\(["\']?https://static-2v\.gitbook\.com[^}]*\}',
+    re.IGNORECASE | re.DOTALL,
+)
+_CSS_GITBOOK_URL_RE = re.compile(
+    r'url\(["\']?https://static-2v\.gitbook\.com[^)]*\)', re.IGNORECASE
+)
+
 
 class DocsetBuilder:
     """Builds a Dash docset from existing HTML documentation."""
@@ -51,10 +144,12 @@ class DocsetBuilder:
         source_docs_dir: Path,
         output_dir: Path,
         docset_name: str = "Raycast",
+        jobs: int | None = None,
     ):
         self.source_docs_dir = source_docs_dir
         self.output_dir = output_dir
         self.docset_name = docset_name
+        self.jobs = jobs or os.cpu_count()
 
         # Docset paths
         self.docset_dir = output_dir / f"{docset_name}.docset"
@@ -63,6 +158,13 @@ class DocsetBuilder:
         self.documents_dir = self.resources_dir / "Documents"
         self.db_path = self.resources_dir / "docSet.dsidx"
 
+        # Files reused across builds (kept outside the docset, which is
+        # recreated on every build)
+        self.cache_dir = output_dir / ".build-cache"
+        self.icon_cache_path = self.cache_dir / "icon.png"
+        self.html_cache_path = self.cache_dir / "html.json"
+        self.html_cache_dir = self.cache_dir / "html"
+
     def build(self) -> None:
         """Build the complete docset."""
         print(f"Building {self.docset_name} docset...")
@@ -70,17 +172,21 @@ class DocsetBuilder:
         # Create directory structure
         self._create_structure()
 
-        # Copy HTML files
-        self._copy_documents()
+        # Fetch the icon in the background while the pages are processed
+        with ThreadPoolExecutor(max_workers=1) as icon_executor:
+            icon_future = icon_executor.submit(self._fetch_icon_bytes)
+
+            # Copy HTML files, collecting index entries from each processed page
+            entries = self._copy_documents()
 
-        # Create Info.plist
-        self._create_info_plist()
+            # Create Info.plist
+            self._create_info_plist()
 
-        # Copy or download icon
-        self._setup_icon()
+            # Copy or download icon
+            self._setup_icon(icon_future)
 
         # Create SQLite index
-        self._create_index()
+        self._create_index(entries)
 
         print(f"Docset created at: {self.docset_dir}")
 
@@ -95,8 +201,12 @@ class DocsetBuilder:
         # Create directories
         self.documents_dir.mkdir(parents=True)
 
-    def _copy_documents(self) -> None:
-        """Copy HTML documentation to the docset, injecting TOC anchors."""
+    def _copy_documents(self) -> list[IndexEntry]:
+        """Copy HTML documentation to the docset, injecting TOC anchors.
+
+        Returns:
+            Index entries extracted from the processed HTML pages
+        """
         print("Copying documentation files...")
 
         # Look for raycast docs
@@ -109,31 +219,73 @@ class DocsetBuilder:
             source_root = self.source_docs_dir
             dest_root = self.documents_dir
 
-        # Copy all files, processing HTML files for TOC injection
-        html_count = 0
-        for source_file in source_root.rglob("*"):
-            if source_file.is_dir():
-                continue
-
-            relative = source_file.relative_to(source_root)
+        # Pages processed by a previous build, keyed by page digest
+        html_cache = self._load_html_cache()
+        new_html_cache: dict[str, list[list[str]]] = {}
+        self.html_cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Copy all files, collecting HTML files for TOC injection. Unchanged
+        # pages are restored from the cache instead. Index entries are kept
+        # per page in walk order, so the index doesn't depend on which pages
+        # were cached.
+        page_entries: list[list[IndexEntry]] = []
+        html_jobs = []
+        # Slot in page_entries and cache key of each job
+        job_pages: list[tuple[int, str]] = []
+        cached_count = 0
+        # Directories already created, so each is only made once
+        ensured_dirs: set[str] = set()
+        source_prefix_len = len(str(source_root)) + 1
+        for entry in _walk_files(source_root):
+            relative = entry.path[source_prefix_len:]
 
             # Skip gitbook internal directories (image proxy cache, etc.)
-            if "~gitbook" in str(relative):
+            if "~gitbook" in relative:
                 continue
             dest_file = dest_root / relative
-            dest_file.parent.mkdir(parents=True, exist_ok=True)
-
-            if source_file.suffix == ".html":
-                # Process HTML files to inject TOC anchors
-                self._copy_html_with_toc(source_file, dest_file)
+            dest_dir = os.path.dirname(relative)
+            if dest_dir not in ensured_dirs:
+                dest_file.parent.mkdir(parents=True, exist_ok=True)
+                ensured_dirs.add(dest_dir)
+
+            if entry.name.endswith(".html"):
+                digest = _page_digest(str(dest_file.relative_to(self.documents_dir)), entry.path)
+                cached_file = self.html_cache_dir / f"{digest}.html"
+                cached_entries = _cached_page_entries(html_cache.get(digest))
+                if cached_entries is not None and cached_file.exists():
+                    shutil.copyfile(cached_file, dest_file)
+                    page_entries.append(cached_entries)
+                    new_html_cache[digest] = [list(entry) for entry in cached_entries]
+                    cached_count += 1
+                else:
+                    html_jobs.append(
+                        (Path(entry.path), dest_file, self.documents_dir, cached_file)
+                    )
+                    job_pages.append((len(page_entries), digest))
+                    page_entries.append([])
+            else:
+                # Copy other files directly. Dash doesn't need the file
+                # metadata, so skip copy2's extra stat/utime/chmod calls and
+                # let copyfile use the kernel's zero-copy path.
+                shutil.copyfile(entry.path, dest_file)
+
+        # Process HTML files to inject TOC anchors and extract index entries
+        # from the same parse. Parsing is CPU-bound, so spread the files over
+        # worker processes.
+        html_count = 0
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            results = executor.map(_process_html, html_jobs, chunksize=32)
+            for (slot, digest), entries in zip(job_pages, results):
+                page_entries[slot] = entries
+                new_html_cache[digest] = [list(entry) for entry in entries]
                 html_count += 1
                 if html_count % 50 == 0:
                     print(f"  Processed {html_count} HTML files...")
-            else:
-                # Copy other files directly
-                shutil.copy2(source_file, dest_file)
 
         print(f"  Processed {html_count} HTML files with TOC injection")
+        if cached_count:
+            print(f"  Reused {cached_count} unchanged HTML files from the build cache")
+        self._save_html_cache(new_html_cache)
 
         # Copy GitBook static assets (CSS, JS) if present
         gitbook_static = self.source_docs_dir / "static-2v.gitbook.com"
@@ -141,7 +293,7 @@ class DocsetBuilder:
             dest_static = self.documents_dir / "static-2v.gitbook.com"
             if dest_static.exists():
                 shutil.rmtree(dest_static)
-            shutil.copytree(gitbook_static, dest_static)
+            shutil.copytree(gitbook_static, dest_static, copy_function=shutil.copyfile)
 
             # Process CSS files to remove external font references
             css_files = list(dest_static.rglob("*.css"))
@@ -149,184 +301,28 @@ class DocsetBuilder:
                 self._fix_css_fonts(css_file)
             print(f"  Copied and processed {len(css_files)} CSS files from GitBook static assets")
 
-    def _copy_html_with_toc(self, source_file: Path, dest_file: Path) -> None:
-        """Copy an HTML file, injecting dashAnchor elements for TOC support."""
-        try:
-            content = source_file.read_text(encoding="utf-8", errors="replace")
-
-            # Fix paths before parsing
-            content = self._fix_paths(content, dest_file)
-
-            soup = BeautifulSoup(content, "lxml")
-
-            # Remove navigation elements that have broken links in offline docset
-            # Remove header/navbar
-            for header in soup.find_all("header"):
-                header.decompose()
-            # Remove any nav elements with site navigation
-            for nav in soup.find_all("nav"):
-                nav.decompose()
-            # Remove aside elements (left sidebar TOC - we use Dash's TOC instead)
-            for aside in soup.find_all("aside"):
-                aside.decompose()
-
-            # Find all headings with IDs (h1, h2, h3)
-            for heading in soup.find_all(["h1", "h2", "h3"], id=True):
-                heading_id = heading.get("id")
-                heading_text = heading.get_text().strip()
-
-                if not heading_id or not heading_text:
-                    continue
-
-                # Skip common navigation headings
-                skip_headings = {"see also", "example", "examples"}
-                if heading_text.lower() in skip_headings:
-                    continue
-
-                # Determine entry type based on heading level
-                if heading.name == "h1":
-                    entry_type = "Guide"
-                elif heading.name == "h2":
-                    entry_type = "Section"
-                else:
-                    entry_type = "Section"
-
-                # URL encode the name for the anchor
-                encoded_name = quote(heading_text, safe="")
-
-                # Create dashAnchor element
-                anchor = soup.new_tag("a")
-                anchor["name"] = f"//apple_ref/cpp/{entry_type}/{encoded_name}"
-                anchor["class"] = "dashAnchor"
-
-                # Insert anchor inside the heading (at the start) so the heading isn't cut off
-                heading.insert(0, anchor)
-
-            # Inject CSS to fix scroll margin when navigating via TOC
-            style_tag = soup.new_tag("style")
-            style_tag.string = """
-                h1:has(.dashAnchor), h2:has(.dashAnchor), h3:has(.dashAnchor) {
-                    scroll-margin-top: 80px !important;
-                }
-            """
-            if soup.head:
-                soup.head.append(style_tag)
-
-            # Write modified HTML
-            dest_file.write_text(str(soup), encoding="utf-8")
-
-        except Exception:
-            # If processing fails, just copy the file as-is
-            shutil.copy2(source_file, dest_file)
+        return [entry for entries in page_entries for entry in entries]
 
-    def _fix_paths(self, content: str, dest_file: Path) -> str:
-        """Fix paths in HTML content for offline viewing.
-
-        Args:
-            content: HTML content to fix
-            dest_file: Destination file path
+    def _load_html_cache(self) -> dict[str, list[list[str]]]:
+        """Load the page cache written by the previous build.
 
         Returns:
-            HTML content with fixed paths
+            Index entry fields per page digest, empty if there is no usable cache
         """
-        # Calculate depth from documents root
         try:
-            relative_to_docs = dest_file.relative_to(self.documents_dir)
-            depth = len(relative_to_docs.parts) - 1
-        except ValueError:
-            depth = 0
-
-        prefix = "../" * depth
-
-        # Remove analytics scripts
-        content = re.sub(
-            r"<script[^>]*googletagmanager[^>]*>.*?</script>",
-            "",
-            content,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-        content = re.sub(
-            r"<script[^>]*google-analytics[^>]*>.*?</script>",
-            "",
-            content,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-
-        # Remove GitBook cookie consent and tracking scripts
-        content = re.sub(
-            r"<script[^>]*gitbook[^>]*>.*?</script>",
-            "",
-            content,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-        # Remove inline scripts that reference cookies/consent
-        content = re.sub(
-            r"<script[^>]*>[^<]*cookie[^<]*</script>",
-            "",
-            content,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-        # Remove any elements with cookie-related classes
-        content = re.sub(
-            r'<div[^>]*class="[^"]*cookie[^"]*"[^>]*>.*?</div>',
-            "",
-            content,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-
-        # Remove preconnect/dns-prefetch links to GitBook (useless offline)
-        content = re.sub(
-            r'<link[^>]*href="https://static-2v\.gitbook\.com"[^>]*/?>',
-            "",
-            content,
-            flags=re.IGNORECASE,
-        )
-
-        # Rewrite external GitBook CSS to local paths
-        # e.g., https://static-2v.gitbook.com/_next/static/css/xxx.css
-        # becomes ../static-2v.gitbook.com/_next/static/css/xxx.css (relative to depth)
-        content = re.sub(
-            r'href="https://static-2v\.gitbook\.com/([^"]+)"',
-            f'href="{prefix}static-2v.gitbook.com/\\1"',
-            content,
-            flags=re.IGNORECASE,
-        )
-
-        # Remove external FontAwesome SVG requests
-        content = re.sub(
-            r'<[^>]*ka-p\.fontawesome\.com[^>]*>',
-            "",
-            content,
-            flags=re.IGNORECASE,
-        )
+            cache = jsonio.loads(self.html_cache_path.read_bytes())
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
 
-        # Remove all attributes containing GitBook image proxy URLs
-        # These are dynamic image URLs that won't work offline
-        # Matches src, srcset, href, content, etc.
-        content = re.sub(
-            r'\s+(src|srcset|href|content)="[^"]*~gitbook/image[^"]*"\s*',
-            ' ',
-            content,
-            flags=re.IGNORECASE,
-        )
-        # Strip all gitbook image proxy URLs anywhere (JSON-LD, JS arrays, etc.)
-        # Match any URL containing ~gitbook/image up to common terminators
-        content = re.sub(
-            r'[^"\'<>\s,\[\]]*~gitbook/image[^"\'<>\s,\[\]]*',
-            '',
-            content,
-            flags=re.IGNORECASE,
-        )
+    def _save_html_cache(self, cache: dict[str, list[list[str]]]) -> None:
+        """Persist the page cache and drop cached pages that are no longer used."""
+        with os.scandir(self.html_cache_dir) as cached_files:
+            for cached_file in cached_files:
+                if cached_file.name.removesuffix(".html") not in cache:
+                    os.remove(cached_file.path)
 
-        # Clean up orphaned srcset/imagesrcset width descriptors (e.g., srcset=" 1200w" after URL removal)
-        content = re.sub(
-            r' (image)?srcset="\s*(\d+w\s*,?\s*)+"\s*',
-            ' ',
-            content,
-            flags=re.IGNORECASE,
-        )
-
-        return content
+        self.html_cache_path.write_bytes(jsonio.dumps(cache))
 
     def _fix_css_fonts(self, css_file: Path) -> None:
         """Remove external font references from CSS files.
@@ -339,54 +335,50 @@ class DocsetBuilder:
 
             # Remove @font-face rules that reference external URLs
             # Match @font-face { ... url(https://static-2v.gitbook.com/...) ... }
-            content = re.sub(
-                r'@font-face\s*\{[^}]*url\(["\']?https://static-2v\.gitbook\.com[^}]*\}',
-                '',
-                content,
-                flags=re.IGNORECASE | re.DOTALL,
-            )
+            content = _CSS_GITBOOK_FONT_FACE_RE.sub("", content)
 
             # Also remove any remaining url() references to gitbook fonts
-            content = re.sub(
-                r'url\(["\']?https://static-2v\.gitbook\.com[^)]*\)',
-                'url()',
-                content,
-                flags=re.IGNORECASE,
-            )
+            content = _CSS_GITBOOK_URL_RE.sub("url()", content)
 
             css_file.write_text(content, encoding="utf-8")
         except Exception:
             pass  # If processing fails, leave the file as-is
 
-    def _setup_icon(self) -> None:
-        """Set up the docset icon."""
+    def _setup_icon(self, icon_future: Future[bytes]) -> None:
+        """Set up the docset icon.
+
+        Args:
+            icon_future: Pending result of _fetch_icon_bytes
+        """
         # Try to download Raycast icon
-        self._download_raycast_icon()
+        self._download_raycast_icon(icon_future)
 
-    def _download_raycast_icon(self) -> None:
-        """Download and create Raycast icons in required sizes."""
+    def _download_raycast_icon(self, icon_future: Future[bytes]) -> None:
+        """Create Raycast icons in required sizes from the downloaded image."""
         print("Downloading Raycast icon...")
 
-        # Raycast logo from their website
-        icon_url = "https://www.raycast.com/favicon-production.png"
-
         try:
-            response = requests.get(icon_url, timeout=30)
-            response.raise_for_status()
+            # Download errors are re-raised here
+            img_bytes = icon_future.result()
+
+            # Imported here: only the icon step needs Pillow, and the HTML
+            # worker processes import this module too
+            from PIL import Image
 
             # Open the image
-            img = Image.open(BytesIO(response.content))
+            img = Image.open(BytesIO(img_bytes))
 
             # Convert to RGBA if necessary
             if img.mode != "RGBA":
                 img = img.convert("RGBA")
 
-            # Create 16x16 icon
-            icon_16 = img.resize((16, 16), Image.Resampling.LANCZOS)
+            # Create 16x16 icon. reducing_gap lets Pillow shrink large
+            # sources with a cheap box reduce before the LANCZOS pass.
+            icon_16 = img.resize((16, 16), Image.Resampling.LANCZOS, reducing_gap=3.0)
             icon_16.save(self.docset_dir / "icon.png", "PNG")
 
             # Create 32x32 icon
-            icon_32 = img.resize((32, 32), Image.Resampling.LANCZOS)
+            icon_32 = img.resize((32, 32), Image.Resampling.LANCZOS, reducing_gap=3.0)
             icon_32.save(self.docset_dir / "icon@2x.png", "PNG")
 
             print("Created icon.png (16x16) and icon@2x.png (32x32)")
@@ -394,6 +386,43 @@ class DocsetBuilder:
         except Exception as e:
             print(f"Warning: Could not download icon: {e}")
 
+    def _fetch_icon_bytes(self) -> bytes:
+        """Return the Raycast icon, downloading it only when the cache is stale.
+
+        A cached icon younger than ICON_CACHE_MAX_AGE is used as-is. Older
+        ones are revalidated with a conditional request, and the cached copy
+        is also used whenever the download fails.
+        """
+        cache = self.icon_cache_path
+        headers = {}
+        if cache.exists():
+            mtime = cache.stat().st_mtime
+            if time.time() - mtime < ICON_CACHE_MAX_AGE:
+                return cache.read_bytes()
+            headers["If-Modified-Since"] = formatdate(mtime, usegmt=True)
+
+        try:
+            response = requests.get(ICON_URL, headers=headers, timeout=30)
+        except requests.RequestException:
+            if cache.exists():
+                return cache.read_bytes()
+            raise
+
+        if response.status_code == 304 and cache.exists():
+            # Not modified: reset the cached icon's age so we don't ask again
+            # on every build
+            cache.touch()
+            return cache.read_bytes()
+        if response.status_code != 200 and cache.exists():
+            # A failed refresh: keep the cached icon as it is, so the next
+            # build tries again
+            return cache.read_bytes()
+        response.raise_for_status()
+
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_bytes(response.content)
+        return response.content
+
     def _create_info_plist(self) -> None:
         """Create the Info.plist file."""
         print("Creating Info.plist...")
@@ -410,14 +439,30 @@ class DocsetBuilder:
         plist_path = self.contents_dir / "Info.plist"
         plist_path.write_text(plist_content)
 
-    def _create_index(self) -> None:
-        """Create the SQLite search index."""
+    def _create_index(self, entries: Iterable[IndexEntry]) -> None:
+        """Create the SQLite search index.
+
+        Args:
+            entries: Index entries collected while copying the documents
+        """
         print("Creating search index...")
 
-        # Create database
-        conn = sqlite3.connect(self.db_path)
+        # Create database. Transactions are managed explicitly below.
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
         cursor = conn.cursor()
 
+        # This is a build artifact written once by this process alone: hold
+        # the file lock for the whole connection, keep the rollback journal
+        # and temporary b-trees in memory, and skip fsyncs. The page size
+        # has to be set before the first table is created.
+        cursor.executescript("""
+            PRAGMA locking_mode=EXCLUSIVE;
+            PRAGMA journal_mode=MEMORY;
+            PRAGMA synchronous=OFF;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA page_size=4096;
+        """)
+
         # Create table
         cursor.execute("""
             CREATE TABLE searchIndex(
@@ -428,58 +473,313 @@ class DocsetBuilder:
             )
         """)
 
+        # Index all documents in a single transaction. Duplicates are dropped
+        # here (entries are tuples, so they dedupe as rows), so the plain
+        # INSERT never trips the unique index, which is only built once all
+        # rows are in.
+        rows = list(dict.fromkeys(entries))
+
+        cursor.execute("BEGIN")
+        cursor.executemany("INSERT INTO searchIndex(name, type, path) VALUES (?, ?, ?)", rows)
+        entries_count = len(rows)
+
         # Create unique index to prevent duplicates
         cursor.execute("""
             CREATE UNIQUE INDEX anchor ON searchIndex (name, type, path)
         """)
+        cursor.execute("COMMIT")
 
-        # Index all documents
-        entries_count = 0
-        for entry in self._collect_entries():
-            try:
-                cursor.execute(
-                    "INSERT OR IGNORE INTO searchIndex(name, type, path) VALUES (?, ?, ?)",
-                    (entry.name, entry.entry_type, entry.path),
-                )
-                entries_count += 1
-            except sqlite3.IntegrityError:
-                pass  # Duplicate entry, skip
-
-        conn.commit()
+        # Repack the finished database so the docset ships without free pages
+        cursor.execute("VACUUM")
         conn.close()
 
         print(f"Indexed {entries_count} entries")
 
-    def _collect_entries(self) -> Iterator[IndexEntry]:
-        """Collect all index entries from the documentation."""
-        docs_root = self.documents_dir
 
-        # Find all HTML files
-        html_files = list(docs_root.rglob("*.html"))
-        total_files = len(html_files)
+def _walk_files(root: str | os.PathLike[str]) -> Iterator[os.DirEntry[str]]:
+    """Recursively yield the files below root.
+
+    Uses os.scandir so file type checks come from the cached directory
+    entries instead of a stat call per path. Symlinked directories are not
+    followed, matching Path.rglob.
+    """
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_files(entry.path)
+            elif entry.is_file():
+                yield entry
+
+
+@functools.cache
+def _processing_digest() -> bytes:
+    """Hash of the code and lxml version that produce the processed pages."""
+    digest = hashlib.sha1(repr(etree.LXML_VERSION).encode())
+    for source in _PAGE_PROCESSING_SOURCES:
+        digest.update(source.read_bytes())
+    return digest.digest()
+
+
+def _cached_page_entries(cached: list[list[str]] | None) -> list[IndexEntry] | None:
+    """Rebuild a page's index entries from the build cache.
+
+    The cache file is only checked to be a JSON object, so the fields of
+    an entry may be missing or extra.
+
+    Returns:
+        The entries, or None if the cache holds none (or malformed ones) for
+        the page
+    """
+    if cached is None:
+        return None
+    try:
+        return [IndexEntry(*fields) for fields in cached]
+    except TypeError:
+        return None
+
+
+def _page_digest(relative_path: str, source_path: str) -> str:
+    """Return the build cache key for a source page.
+
+    The processed output depends on where the page lives in Documents
+    (relative links are rewritten by depth, index entries carry the path), so
+    that path is hashed along with the content and the processing code.
+    """
+    digest = hashlib.sha1(_processing_digest())
+    digest.update(f"{relative_path}\0".encode())
+    with open(source_path, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _copy_html_with_toc(
+    source_file: Path, dest_file: Path, documents_dir: Path
+) -> list[IndexEntry]:
+    """Copy an HTML file, injecting dashAnchor elements for TOC support.
+
+    The index entries for the page are extracted from the same tree that is
+    written out, so every page is only parsed once.
+
+    Returns:
+        Index entries for the page
+    """
+    relative_path = str(dest_file.relative_to(documents_dir))
+
+    try:
+        # Work on raw bytes throughout; the pages are UTF-8 and lxml's
+        # recovery mode handles any invalid sequences
+        content = source_file.read_bytes()
+
+        # Fix paths before parsing
+        content = _fix_paths(content, dest_file, documents_dir)
+
+        # Pages without site chrome only need anchors added, which can be
+        # done on the bytes directly, leaving the rest of the page untouched.
+        # The page is still parsed afterwards to extract its index entries.
+        injected = _inject_anchors(content)
+        if injected is not None:
+            dest_file.write_bytes(injected)
+            tree = lxml_html.document_fromstring(injected, parser=HTML_PARSER)
+            return index_tree(tree, relative_path)
+
+        tree = lxml_html.document_fromstring(content, parser=HTML_PARSER)
+
+        # Walk the tree once, collecting navigation elements and headings.
+        # Materialize the list first since dropping elements mutates the tree.
+        for element in list(tree.iter("header", "nav", "aside", "h1", "h2", "h3")):
+            # Remove navigation elements that have broken links in offline docset:
+            # header/navbar, site navigation, and aside elements (left sidebar
+            # TOC - we use Dash's TOC instead)
+            if element.tag in _NAVIGATION_TAGS:
+                element.drop_tree()
+                continue
+
+            # Only headings with IDs get a TOC entry
+            heading = element
+            heading_id = heading.get("id")
+            heading_text = heading.text_content().strip()
+
+            if not heading_id or not heading_text:
+                continue
+
+            # Skip common navigation headings
+            if (
+                len(heading_text) <= _MAX_SKIP_TOC_HEADING_LEN
+                and heading_text.lower() in _SKIP_TOC_HEADINGS
+            ):
+                continue
+
+            # Determine entry type based on heading level
+            if heading.tag == "h1":
+                entry_type = "Guide"
+            else:
+                entry_type = "Section"
+
+            # URL encode the name for the anchor
+            encoded_name = _quote_anchor_name(heading_text)
+
+            # Create dashAnchor element
+            anchor = heading.makeelement(
+                "a",
+                {"name": f"//apple_ref/cpp/{entry_type}/{encoded_name}", "class": "dashAnchor"},
+            )
+
+            # Insert anchor inside the heading (at the start) so the heading isn't cut off.
+            # lxml keeps leading text on the parent, so move it behind the anchor.
+            anchor.tail, heading.text = heading.text, None
+            heading.insert(0, anchor)
+
+        # Inject CSS to fix scroll margin when navigating via TOC
+        head = tree.find("head")
+        if head is not None:
+            style_tag = etree.SubElement(head, "style")
+            style_tag.text = _TOC_SCROLL_CSS
+
+        # Write modified HTML (serialize the whole document to keep the doctype)
+        with dest_file.open("wb") as f:
+            tree.getroottree().write(f, method="html", encoding="utf-8")
+
+    except Exception:
+        # If processing fails, just copy the file as-is and index that
+        shutil.copyfile(source_file, dest_file)
+        return index_file(dest_file, relative_path)
+
+    return index_tree(tree, relative_path)
+
+
+def _inject_anchors(content: bytes) -> bytes | None:
+    """Inject dashAnchor elements and the TOC CSS without parsing the page.
+
+    Returns:
+        The page with anchors injected, or None when the page needs the
+        tree-based path (navigation elements to strip, a <template>, no
+        headings to anchor, or no </head> to add the CSS to)
+    """
+    if _TREE_ONLY_TAG_RE.search(content):
+        return None
+
+    heading_count = 0
+
+    def add_anchor(match: re.Match[bytes]) -> bytes:
+        nonlocal heading_count
+        _, tag, attrs, inner = match.groups()
+        heading = match.group(0)
+
+        # Comment or text-only element
+        if tag is None:
+            return heading
+        heading_count += 1
+
+        # Only headings with IDs get a TOC entry
+        if not _HEADING_ID_RE.search(attrs):
+            return heading
+
+        # Same text as text_content() on the parsed heading
+        text = html.unescape(_TAG_RE.sub(b"", inner).decode("utf-8", "replace")).strip()
+        if not text or (
+            len(text) <= _MAX_SKIP_TOC_HEADING_LEN and text.lower() in _SKIP_TOC_HEADINGS
+        ):
+            return heading
+
+        entry_type = "Guide" if tag.lower() == b"h1" else "Section"
+        anchor = (
+            f'<a name="//apple_ref/cpp/{entry_type}/{_quote_anchor_name(text)}" '
+            f'class="dashAnchor"></a>'
+        ).encode()
+
+        # Insert the anchor right after the heading's opening tag
+        split = match.start(4) - match.start()
+        return heading[:split] + anchor + heading[split:]
+
+    content = _HEADING_RE.sub(add_anchor, content)
+    if not heading_count:
+        return None
+
+    content, head_count = _HEAD_CLOSE_RE.subn(
+        lambda match: b"<style>" + _TOC_SCROLL_CSS.encode() + b"</style>" + match.group(0),
+        content,
+        count=1,
+    )
+    if not head_count:
+        return None
+
+    return content
+
+
+def _quote_anchor_name(name: str) -> str:
+    """URL encode a heading for a dashAnchor name, like quote(name, safe="").
 
-        print(f"Processing {total_files} HTML files...")
+    Names that contain only unreserved characters are returned unchanged
+    without going through the percent-encoding loop.
+    """
+    name_bytes = name.encode("utf-8")
+    if not name_bytes.translate(None, _UNRESERVED_BYTES):
+        return name
+    return quote_from_bytes(name_bytes, safe="")
+
+
+def _fix_paths(content: bytes, dest_file: Path, documents_dir: Path) -> bytes:
+    """Fix paths in HTML content for offline viewing.
+
+    Args:
+        content: Raw HTML bytes to fix
+        dest_file: Destination file path
+        documents_dir: Root of the docset's Documents directory
+
+    Returns:
+        HTML bytes with fixed paths
+    """
+    # Calculate depth from documents root
+    try:
+        relative_to_docs = dest_file.relative_to(documents_dir)
+        depth = len(relative_to_docs.parts) - 1
+    except ValueError:
+        depth = 0
+
+    prefix = b"../" * depth
 
-        for i, html_file in enumerate(html_files, 1):
-            if i % 50 == 0:
-                print(f"  Progress: {i}/{total_files} files...")
+    # Remove analytics, GitBook cookie consent and tracking scripts
+    content = _SCRIPT_NOISE_RE.sub(b"", content)
 
-            # Get relative path from documents root
-            relative_path = str(html_file.relative_to(docs_root))
+    # Remove preconnect/dns-prefetch links to GitBook (useless offline)
+    content = _GITBOOK_PRECONNECT_RE.sub(b"", content)
 
-            # Run ALL matching parsers
-            for parser in ALL_PARSERS:
-                if parser.matches(relative_path):
-                    try:
-                        yield from parser.parse(html_file, relative_path)
-                    except Exception as e:
-                        print(f"  Warning: Error parsing {relative_path}: {e}")
+    # Rewrite external GitBook CSS to local paths
+    # e.g., https://static-2v.gitbook.com/_next/static/css/xxx.css
+    # becomes ../static-2v.gitbook.com/_next/static/css/xxx.css (relative to depth)
+    content = _GITBOOK_STATIC_HREF_RE.sub(b'href="' + prefix + rb'static-2v.gitbook.com/\1"', content)
+
+    # Remove external FontAwesome SVG requests
+    content = _FONTAWESOME_RE.sub(b"", content)
+
+    # Remove all attributes containing GitBook image proxy URLs, then strip
+    # any remaining proxy URLs (JSON-LD, JS arrays, etc.)
+    content = _GITBOOK_IMAGE_ATTR_RE.sub(b" ", content)
+    content = _GITBOOK_IMAGE_URL_RE.sub(b"", content)
+
+    # Clean up orphaned srcset/imagesrcset width descriptors (e.g., srcset=" 1200w" after URL removal)
+    content = _ORPHAN_SRCSET_RE.sub(b" ", content)
+
+    return content
+
+
+def _process_html(job: tuple[Path, Path, Path, Path]) -> list[IndexEntry]:
+    """Process pool entry point for a single HTML file.
+
+    The processed page is also stored in the build cache so the next build
+    can skip it if the source is unchanged.
+    """
+    source_file, dest_file, documents_dir, cached_file = job
+    entries = _copy_html_with_toc(source_file, dest_file, documents_dir)
+    shutil.copyfile(dest_file, cached_file)
+    return entries
 
 
 def build_docset(
     source_docset_path: Path,
     output_dir: Path,
     docset_name: str = "Raycast",
+    jobs: int | None = None,
 ) -> Path:
     """Build a new Dash docset from scraped documentation.
 
@@ -487,6 +787,7 @@ def build_docset(
         source_docset_path: Path to the source documentation directory
         output_dir: Directory where the new docset will be created
         docset_name: Name for the docset
+        jobs: Number of worker processes for HTML processing (default: CPU count)
 
     Returns:
         Path to the created docset
@@ -501,6 +802,7 @@ def build_docset(
         source_docs_dir=source_docs,
         output_dir=output_dir,
         docset_name=docset_name,
+        jobs=jobs,
     )
 
     builder.build()
@@ -0,0 +1,26 @@
+"""JSON helpers for the scrape and build cache files, using orjson when installed."""
+
+import json
+from types import ModuleType
+from typing import Any
+
+# Optional: the "fast" extra
+orjson: ModuleType | None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj to compact UTF-8 encoded JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    """Deserialize JSON. Invalid input raises ValueError."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
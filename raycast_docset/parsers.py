@@ -1,42 +1,88 @@
 """Parsers for extracting index entries from Raycast documentation HTML."""
 
 import re
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterator
-from urllib.parse import unquote
+from typing import Iterator, NamedTuple, Protocol
+from urllib.parse import quote, unquote
 
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.html import HtmlElement
 
 
-@dataclass
-class IndexEntry:
-    """Represents a single entry in the Dash search index."""
+# Shared by every parse in the process instead of setting up a new parser per
+# file. lxml parsers must not be used from several threads at once; pages are
+# parsed in worker processes, one page at a time each.
+HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8", recover=True, remove_comments=True)
+
+
+class IndexEntry(NamedTuple):
+    """Represents a single entry in the Dash search index.
+
+    A tuple in searchIndex column order, so it is small, hashable and can be
+    inserted as a row directly.
+    """
 
     name: str
     entry_type: str
     path: str
 
 
-def parse_html_file(file_path: Path) -> BeautifulSoup:
-    """Parse an HTML file and return a BeautifulSoup object."""
-    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-        return BeautifulSoup(f.read(), "lxml")
+class PageParser(Protocol):
+    """What the builder needs from a parser in ALL_PARSERS."""
+
+    def matches(self, relative_path: str) -> bool: ...
+
+    def parse(self, file_path: Path, relative_path: str) -> Iterator[IndexEntry]: ...
+
+    def parse_tree(self, tree: HtmlElement, relative_path: str) -> Iterator[IndexEntry]: ...
+
 
+def parse_html_file(file_path: Path) -> HtmlElement:
+    """Parse an HTML file and return the root element of the document.
 
-def get_title_from_soup(soup: BeautifulSoup) -> str | None:
-    """Extract the page title from a BeautifulSoup object."""
+    lxml reads the file itself, so no Python-level copy of the page is made.
+    """
+    root = etree.parse(str(file_path), HTML_PARSER).getroot()
+    if root is None:
+        raise ValueError(f"No HTML document in {file_path}")
+    return root
+
+
+# Titles of API reference pages that document UI components
+_UI_COMPONENT_RE = re.compile(r"list|grid|form|detail|action")
+
+# Generic API reference headings that don't get their own entry
+_SKIP_HEADINGS = frozenset(
+    {
+        "example",
+        "examples",
+        "props",
+        "properties",
+        "return",
+        "returns",
+        "parameters",
+        "signature",
+        "see also",
+    }
+)
+# Longer headings can't be skipped, so they are never lowercased
+_MAX_SKIP_HEADING_LEN = max(map(len, _SKIP_HEADINGS))
+
+
+def get_title(tree: HtmlElement) -> str | None:
+    """Extract the page title from a parsed HTML document."""
     # Try to find the main heading first
-    h1 = soup.find("h1")
-    if h1:
-        title = h1.get_text().strip()
+    h1 = tree.find(".//h1")
+    if h1 is not None:
+        title = h1.text_content().strip()
         if title:
             return title
 
     # Fall back to title tag
-    title_tag = soup.find("title")
-    if title_tag:
-        title = title_tag.get_text()
+    title_tag = tree.find(".//title")
+    if title_tag is not None:
+        title = title_tag.text_content()
         # Titles are usually "Name | Raycast API" or similar
         if " | " in title:
             return title.split(" | ")[0].strip()
@@ -62,14 +108,17 @@ class APIReferenceParser:
 
     def parse(self, file_path: Path, relative_path: str) -> Iterator[IndexEntry]:
         """Parse an API reference page and yield index entries."""
-        soup = parse_html_file(file_path)
-        title = get_title_from_soup(soup)
+        yield from self.parse_tree(parse_html_file(file_path), relative_path)
+
+    def parse_tree(self, tree: HtmlElement, relative_path: str) -> Iterator[IndexEntry]:
+        """Parse an API reference page tree and yield index entries."""
+        title = get_title(tree)
 
         if not title:
             return
 
         # Determine entry type based on content
-        entry_type = self._determine_entry_type(soup, title, relative_path)
+        entry_type = self._determine_entry_type(title, relative_path)
 
         yield IndexEntry(
             name=title,
@@ -78,20 +127,15 @@ class APIReferenceParser:
         )
 
         # Parse functions, types, and properties from the page
-        yield from self._parse_api_elements(soup, relative_path, title)
+        yield from self._parse_api_elements(tree, relative_path, title)
 
-    def _determine_entry_type(
-        self, soup: BeautifulSoup, title: str, relative_path: str
-    ) -> str:
+    def _determine_entry_type(self, title: str, relative_path: str) -> str:
         """Determine the entry type based on page content."""
         title_lower = title.lower()
 
         # UI components
         if "user-interface" in relative_path:
-            if any(
-                comp in title_lower
-                for comp in ["list", "grid", "form", "detail", "action"]
-            ):
+            if _UI_COMPONENT_RE.search(title_lower):
                 return "Component"
             return "Class"
 
@@ -103,30 +147,22 @@ class APIReferenceParser:
         return "Class"
 
     def _parse_api_elements(
-        self, soup: BeautifulSoup, relative_path: str, parent_name: str
+        self, tree: HtmlElement, relative_path: str, parent_name: str
     ) -> Iterator[IndexEntry]:
         """Parse API elements (functions, types, properties) from the page."""
         # Look for code blocks that define functions/types
-        for heading in soup.find_all(["h2", "h3", "h4"]):
-            heading_text = heading.get_text().strip()
+        for heading in tree.iter("h2", "h3", "h4"):
+            heading_text = heading.text_content().strip()
             heading_id = heading.get("id")
 
             if not heading_id or not heading_text:
                 continue
 
             # Skip generic headings
-            skip_headings = {
-                "example",
-                "examples",
-                "props",
-                "properties",
-                "return",
-                "returns",
-                "parameters",
-                "signature",
-                "see also",
-            }
-            if heading_text.lower() in skip_headings:
+            if (
+                len(heading_text) <= _MAX_SKIP_HEADING_LEN
+                and heading_text.lower() in _SKIP_HEADINGS
+            ):
                 continue
 
             # Detect type of entry
@@ -169,8 +205,11 @@ class UtilitiesParser:
 
     def parse(self, file_path: Path, relative_path: str) -> Iterator[IndexEntry]:
         """Parse a utilities page and yield index entries."""
-        soup = parse_html_file(file_path)
-        title = get_title_from_soup(soup)
+        yield from self.parse_tree(parse_html_file(file_path), relative_path)
+
+    def parse_tree(self, tree: HtmlElement, relative_path: str) -> Iterator[IndexEntry]:
+        """Parse a utilities page tree and yield index entries."""
+        title = get_title(tree)
 
         if not title:
             return
@@ -197,30 +236,22 @@ class UtilitiesParser:
 class GuideParser:
     """Parser for guide and tutorial pages."""
 
-    # Patterns for different guide types
-    BASICS_PATTERN = re.compile(r"basics/")
-    AI_PATTERN = re.compile(r"ai/")
-    TEAMS_PATTERN = re.compile(r"teams/")
+    # Guide sections: basics, AI, teams, examples and information
+    PATH_PATTERN = re.compile(r"(?:basics|ai|teams|examples|information)/")
+    # Examples are indexed as samples rather than guides
     EXAMPLES_PATTERN = re.compile(r"examples/")
-    INFO_PATTERN = re.compile(r"information/")
 
     def matches(self, relative_path: str) -> bool:
         """Check if this parser handles the given path."""
-        return any(
-            pattern.search(relative_path)
-            for pattern in [
-                self.BASICS_PATTERN,
-                self.AI_PATTERN,
-                self.TEAMS_PATTERN,
-                self.EXAMPLES_PATTERN,
-                self.INFO_PATTERN,
-            ]
-        )
+        return bool(self.PATH_PATTERN.search(relative_path))
 
     def parse(self, file_path: Path, relative_path: str) -> Iterator[IndexEntry]:
         """Parse a guide page and yield index entries."""
-        soup = parse_html_file(file_path)
-        title = get_title_from_soup(soup)
+        yield from self.parse_tree(parse_html_file(file_path), relative_path)
+
+    def parse_tree(self, tree: HtmlElement, relative_path: str) -> Iterator[IndexEntry]:
+        """Parse a guide page tree and yield index entries."""
+        title = get_title(tree)
 
         if not title:
             return
@@ -249,8 +280,11 @@ class MiscParser:
 
     def parse(self, file_path: Path, relative_path: str) -> Iterator[IndexEntry]:
         """Parse a misc page and yield index entries."""
-        soup = parse_html_file(file_path)
-        title = get_title_from_soup(soup)
+        yield from self.parse_tree(parse_html_file(file_path), relative_path)
+
+    def parse_tree(self, tree: HtmlElement, relative_path: str) -> Iterator[IndexEntry]:
+        """Parse a misc page tree and yield index entries."""
+        title = get_title(tree)
 
         if not title:
             return
@@ -283,58 +317,94 @@ class DashAnchorParser:
 
     ANCHOR_PATTERN = re.compile(r"//apple_ref/(?:cpp/)?(\w+)/(.+)")
 
+    # Anchors whose class list contains dashAnchor, filtered inside lxml
+    ANCHOR_XPATH = etree.XPath(
+        ".//a[contains(concat(' ', normalize-space(@class), ' '), ' dashAnchor ')]"
+    )
+
     # Generic/noisy entries to skip
-    SKIP_NAMES = {
-        "example",
-        "examples",
-        "see also",
-        "signature",
-        "return",
-        "returns",
-        "parameters",
-        "props",
-        "properties",
-    }
+    SKIP_NAMES = frozenset(
+        {
+            "example",
+            "examples",
+            "see also",
+            "signature",
+            "return",
+            "returns",
+            "parameters",
+            "props",
+            "properties",
+        }
+    )
+    # The same names as they appear, percent-encoded, in anchor names, so
+    # skipped anchors are recognised without unquoting them
+    SKIP_NAMES_ENCODED = SKIP_NAMES | frozenset(quote(name, safe="") for name in SKIP_NAMES)
+    # Longer names can't be skipped, so they are never lowercased
+    MAX_SKIP_NAME_LEN = max(map(len, SKIP_NAMES_ENCODED))
 
     def matches(self, relative_path: str) -> bool:
         """Match any HTML file."""
         return relative_path.endswith(".html")
 
     def parse(self, file_path: Path, relative_path: str) -> Iterator[IndexEntry]:
-        """Extract dashAnchor entries from the HTML."""
-        soup = parse_html_file(file_path)
-
-        for anchor in soup.find_all("a", class_="dashAnchor"):
-            name_attr = anchor.get("name", "")
-            if not isinstance(name_attr, str):
-                continue
-            match = self.ANCHOR_PATTERN.match(name_attr)
-
-            if match:
-                entry_type = match.group(1)
-                entry_name = unquote(match.group(2))
-
-                if entry_name.lower() in self.SKIP_NAMES:
-                    continue
-
-                # Find anchor ID
-                anchor_id = None
-                next_sibling = anchor.find_next_sibling()
-                if next_sibling and next_sibling.get("id"):
-                    anchor_id = next_sibling.get("id")
+        """Extract dashAnchor entries from the HTML file."""
+        yield from self.parse_tree(parse_html_file(file_path), relative_path)
+
+    def parse_tree(self, tree: HtmlElement, relative_path: str) -> Iterator[IndexEntry]:
+        """Extract dashAnchor entries from a parsed page."""
+        for anchor in self.ANCHOR_XPATH(tree):
+            # Find anchor ID on the next sibling element (skipping comments)
+            anchor_id = None
+            next_sibling = anchor.getnext()
+            while next_sibling is not None and not isinstance(next_sibling.tag, str):
+                next_sibling = next_sibling.getnext()
+            if next_sibling is not None and next_sibling.get("id"):
+                anchor_id = next_sibling.get("id")
+
+            entry = self._make_entry(anchor.get("name", ""), anchor_id, relative_path)
+            if entry is not None:
+                yield entry
+
+    def _make_entry(
+        self, name_attr: str, anchor_id: str | None, relative_path: str
+    ) -> IndexEntry | None:
+        """Build the index entry for an anchor, or None if it isn't indexed."""
+        # Cheap prefix check before running the regex
+        if not name_attr.startswith("//apple_ref/"):
+            return None
+        match = self.ANCHOR_PATTERN.match(name_attr)
+        if not match:
+            return None
+
+        entry_type, entry_name = match.groups()
+        if (
+            len(entry_name) <= self.MAX_SKIP_NAME_LEN
+            and entry_name.lower() in self.SKIP_NAMES_ENCODED
+        ):
+            return None
+
+        # Only names with escapes need unquoting; recheck those in case they
+        # were encoded differently than quote() would
+        if "%" in entry_name:
+            entry_name = unquote(entry_name)
+            if (
+                len(entry_name) <= self.MAX_SKIP_NAME_LEN
+                and entry_name.lower() in self.SKIP_NAMES
+            ):
+                return None
 
-                path = relative_path
-                if anchor_id:
-                    path = f"{relative_path}#{anchor_id}"
+        path = relative_path
+        if anchor_id:
+            path = f"{relative_path}#{anchor_id}"
 
-                if len(entry_name) > 80:
-                    entry_name = entry_name[:77] + "..."
+        if len(entry_name) > 80:
+            entry_name = entry_name[:77] + "..."
 
-                yield IndexEntry(
-                    name=entry_name,
-                    entry_type=entry_type,
-                    path=path,
-                )
+        return IndexEntry(
+            name=entry_name,
+            entry_type=entry_type,
+            path=path,
+        )
 
 
 class FallbackParser:
@@ -349,8 +419,11 @@ class FallbackParser:
 
     def parse(self, file_path: Path, relative_path: str) -> Iterator[IndexEntry]:
         """Parse any documentation page as a generic entry."""
-        soup = parse_html_file(file_path)
-        title = get_title_from_soup(soup)
+        yield from self.parse_tree(parse_html_file(file_path), relative_path)
+
+    def parse_tree(self, tree: HtmlElement, relative_path: str) -> Iterator[IndexEntry]:
+        """Index a parsed documentation page as a generic entry."""
+        title = get_title(tree)
 
         if title and title not in ["Raycast API", "Raycast"]:
             yield IndexEntry(
@@ -361,7 +434,7 @@ class FallbackParser:
 
 
 # All parsers in order of specificity
-ALL_PARSERS = [
+ALL_PARSERS: list[PageParser] = [
     DashAnchorParser(),
     APIReferenceParser(),
     UtilitiesParser(),
@@ -369,3 +442,67 @@ ALL_PARSERS = [
     MiscParser(),
     FallbackParser(),
 ]
+
+
+# The section parsers, keyed by the directory each one's PATH_PATTERN looks
+# for, so a single search finds all of them for a path. Keep in sync with
+# the parsers' PATH_PATTERNs.
+_SECTION_PATTERN = re.compile(
+    r"(api-reference|utilities|basics|ai|teams|examples|information|misc)/"
+)
+_SECTION_PARSER_TYPES: dict[str, type[PageParser]] = {
+    "api-reference": APIReferenceParser,
+    "utilities": UtilitiesParser,
+    "basics": GuideParser,
+    "ai": GuideParser,
+    "teams": GuideParser,
+    "examples": GuideParser,
+    "information": GuideParser,
+    "misc": MiscParser,
+}
+_SECTION_TYPES = frozenset(_SECTION_PARSER_TYPES.values())
+
+
+def parsers_for(relative_path: str) -> list[PageParser]:
+    """Return ALL parsers that match a path, in ALL_PARSERS order.
+
+    Equivalent to filtering ALL_PARSERS with matches(), but the section
+    parsers are found with one regex pass instead of one search each.
+    """
+    section_types = {
+        _SECTION_PARSER_TYPES[section] for section in _SECTION_PATTERN.findall(relative_path)
+    }
+    return [
+        parser
+        for parser in ALL_PARSERS
+        if (
+            type(parser) in section_types
+            if type(parser) in _SECTION_TYPES
+            else parser.matches(relative_path)
+        )
+    ]
+
+
+def index_tree(tree: HtmlElement, relative_path: str) -> list[IndexEntry]:
+    """Run ALL matching parsers over a parsed page.
+
+    A parser that fails only loses its own entries for the page.
+    """
+    entries: list[IndexEntry] = []
+    for parser in parsers_for(relative_path):
+        try:
+            entries.extend(parser.parse_tree(tree, relative_path))
+        except Exception as e:
+            print(f"  Warning: Error parsing {relative_path}: {e}")
+    return entries
+
+
+def index_file(file_path: Path, relative_path: str) -> list[IndexEntry]:
+    """Parse an HTML file once and run ALL matching parsers over it."""
+    try:
+        tree = parse_html_file(file_path)
+    except Exception as e:
+        print(f"  Warning: Error parsing {relative_path}: {e}")
+        return []
+    return index_tree(tree, relative_path)
+
@@ -4,13 +4,110 @@ This module uses the llms.txt file to discover all documentation pages,
 then downloads them along with their assets.
 """
 
+import os
 import re
+import shutil
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
 from pathlib import Path
-from urllib.parse import urljoin, urlparse, unquote
+from urllib.parse import (
+    parse_qsl,
+    unquote,
+    urlencode,
+    urljoin,
+    urlparse,
+    urlsplit,
+    urlunsplit,
+)
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.html import HtmlElement
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+from . import jsonio
+
+
+# Static assets referenced by a page, in one pass: stylesheets, scripts,
+# images, icons and preloaded resources. rel holds a list of tokens, so it
+# is matched token-wise like a class attribute.
+_ASSET_URLS_XPATH = etree.XPath(
+    "//link[contains(concat(' ', normalize-space(@rel), ' '), ' stylesheet ')"
+    " or contains(concat(' ', normalize-space(@rel), ' '), ' icon ')"
+    " or contains(concat(' ', normalize-space(@rel), ' '), ' apple-touch-icon ')"
+    " or contains(concat(' ', normalize-space(@rel), ' '), ' preload ')]/@href"
+    " | //script/@src"
+    " | //img/@src",
+    smart_strings=False,
+)
+
+
+_DUPLICATE_SLASHES_RE = re.compile(r"/{2,}")
+
+
+def _canonicalize(url: str) -> str:
+    """Normalize a URL for de-duplication.
+
+    Lowercases the scheme and host, drops the fragment, collapses repeated
+    slashes in the path and sorts the query parameters, so trivially
+    different spellings of a URL are only downloaded once.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = _DUPLICATE_SLASHES_RE.sub("/", parts.path)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write data to path through a temporary file that replaces it.
+
+    An interrupted write never leaves a truncated file behind, which a later
+    scrape would otherwise take as current. Each write uses its own
+    temporary file, so pages whose URLs map to the same path can't corrupt
+    each other.
+    """
+    fd, part_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+        finally:
+            os.close(fd)
+        os.chmod(part_path, 0o644)
+        os.replace(part_path, path)
+    except BaseException:
+        os.unlink(part_path)
+        raise
+
+
+class _HostRateLimiter:
+    """Spaces out requests to each host, shared by all download threads."""
+
+    def __init__(self, delay: float):
+        """Initialize the limiter.
+
+        Args:
+            delay: Minimum seconds between two requests to the same host
+        """
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot: dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        """Block until a request to the URL's host may be sent."""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
 
 
 class RaycastDocScraper:
@@ -22,23 +119,63 @@ class RaycastDocScraper:
     BASE_URL = "https://developers.raycast.com"
     LLMS_TXT_URL = "https://developers.raycast.com/llms.txt"
 
-    def __init__(self, output_dir: Path):
+    # Markdown-style links in llms.txt: [Title](/path/to/page.md)
+    # The llms.txt contains lines like:
+    # - [Introduction](/readme.md): Start building...
+    LLMS_LINK_PATTERN = re.compile(r"\[[^\]]+\]\((/[^)]+\.md)\)")
+
+    # Concurrent page downloads, and concurrent asset downloads per page
+    PAGE_WORKERS = 4
+    ASSET_WORKERS = 8
+
+    # Bytes copied at a time when streaming assets to disk
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, output_dir: Path, download_assets: bool = True):
         """Initialize the scraper.
 
         Args:
             output_dir: Directory to save downloaded files
+            download_assets: Also download the CSS, JS, images and fonts the
+                pages reference (only needed for styling, not for indexing)
         """
         self.output_dir = output_dir
+        self.download_assets = download_assets
         self.session = requests.Session()
         self.session.headers.update(
-            {"User-Agent": "Raycast-Dash-Docset-Generator/1.0"}
+            {
+                "User-Agent": "Raycast-Dash-Docset-Generator/1.0",
+                # Every compression the installed urllib3 can decode
+                "Accept-Encoding": make_headers(accept_encoding=True)["accept-encoding"],
+            }
+        )
+
+        # Keep connections alive across requests and retry transient failures
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504)
+            ),
         )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # ETags of previously downloaded files, for conditional requests
+        self.etags_path = output_dir / ".etags.json"
+        self.etags: dict[str, str] = {}
 
+        # Canonical forms (see _canonicalize) of the pages already handled,
+        # and the local paths of the assets already claimed
         self.visited_urls: set[str] = set()
-        self.downloaded_assets: set[str] = set()
+        self.downloaded_assets: set[Path] = set()
+
+        # Guards the state shared by the download threads
+        self._lock = threading.Lock()
 
         # Rate limiting
-        self.delay = 0.3  # seconds between requests
+        self.delay = 0.3  # seconds between requests to the same host
+        self._rate_limiter = _HostRateLimiter(self.delay)
 
     def scrape(self) -> None:
         """Scrape documentation using the llms.txt file."""
@@ -46,14 +183,20 @@ class RaycastDocScraper:
         print(f"Output directory: {self.output_dir}")
 
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._load_etags()
 
         # Get URLs from llms.txt
         urls = self._get_urls_from_llms_txt()
         print(f"Found {len(urls)} pages to download")
 
-        # Download each page
-        for i, url in enumerate(urls, 1):
-            self._download_page(url, i, len(urls))
+        # Download the pages concurrently; the per-host rate limit still
+        # applies across all threads
+        try:
+            with ThreadPoolExecutor(max_workers=self.PAGE_WORKERS) as executor:
+                for i, url in enumerate(urls, 1):
+                    executor.submit(self._download_page, url, i, len(urls))
+        finally:
+            self._save_etags()
 
         print("\nScraping complete!")
         print(f"  HTML pages: {len(self.visited_urls)}")
@@ -69,23 +212,16 @@ class RaycastDocScraper:
             response = self.session.get(self.LLMS_TXT_URL, timeout=30)
             response.raise_for_status()
 
-            content = response.text
-            urls = []
-
-            # Parse markdown-style links: [Title](/path/to/page.md)
-            # The llms.txt contains lines like:
-            # - [Introduction](/readme.md): Start building...
-            link_pattern = re.compile(r"\[([^\]]+)\]\((/[^)]+\.md)\)")
-
-            for match in link_pattern.finditer(content):
-                path = match.group(2)
-                # Convert .md path to actual URL
-                # GitBook serves these without the .md extension
-                url_path = path.replace(".md", "")
-                if url_path == "/readme":
-                    url_path = "/"
-                url = f"{self.BASE_URL}{url_path}"
-                urls.append(url)
+            # Convert .md paths to actual URLs
+            # GitBook serves these without the .md extension
+            url_paths = (
+                path.removesuffix(".md")
+                for path in self.LLMS_LINK_PATTERN.findall(response.text)
+            )
+            urls = [
+                f"{self.BASE_URL}{'/' if url_path == '/readme' else url_path}"
+                for url_path in url_paths
+            ]
 
             # Also add the root page
             if self.BASE_URL not in urls and f"{self.BASE_URL}/" not in urls:
@@ -105,70 +241,74 @@ class RaycastDocScraper:
             current: Current page number
             total: Total pages to download
         """
-        if url in self.visited_urls:
-            return
-
-        self.visited_urls.add(url)
+        key = _canonicalize(url)
+        with self._lock:
+            if key in self.visited_urls:
+                return
+            self.visited_urls.add(key)
 
         try:
             print(f"Downloading [{current}/{total}]: {url}")
 
-            time.sleep(self.delay)
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-
-            # Save the HTML file
             file_path = self._url_to_filepath(url)
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_bytes(response.content)
+            response = self._fetch(url, file_path)
+
+            if response is None:
+                # Unchanged since the last scrape; still check its assets
+                content = file_path.read_bytes()
+            else:
+                # Save the HTML file
+                content = response.content
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                _atomic_write(file_path, content)
 
             # Download static assets
-            soup = BeautifulSoup(response.content, "lxml")
-            self._download_assets(soup, url)
+            if self.download_assets:
+                tree = lxml_html.document_fromstring(content)
+                self._download_assets(tree, url)
 
         except Exception as e:
             print(f"  Error: {e}")
 
-    def _download_assets(self, soup: BeautifulSoup, page_url: str) -> None:
+    def _download_assets(self, tree: HtmlElement, page_url: str) -> None:
         """Download static assets (CSS, JS, images) referenced in the page.
 
+        The assets are downloaded concurrently, rate limited per host.
+
         Args:
-            soup: BeautifulSoup object of the page
+            tree: Parsed HTML of the page
             page_url: URL of the page being processed
         """
-        # CSS files
-        for link in soup.find_all("link", rel="stylesheet"):
-            if href := link.get("href"):
-                self._download_asset(str(href), page_url)
-
-        # JavaScript files
-        for script in soup.find_all("script", src=True):
-            self._download_asset(str(script["src"]), page_url)
-
-        # Images
-        for img in soup.find_all("img", src=True):
-            self._download_asset(str(img["src"]), page_url)
-
-        # Favicons and other icons
-        for link in soup.find_all("link", rel=["icon", "apple-touch-icon"]):
-            if href := link.get("href"):
-                self._download_asset(str(href), page_url)
-
-        # Preloaded fonts
-        for link in soup.find_all("link", rel="preload"):
-            if href := link.get("href"):
-                self._download_asset(str(href), page_url)
-
-    def _download_asset(self, asset_url: str, page_url: str) -> None:
-        """Download a static asset.
+        # Claim the new assets up front so each is downloaded only once
+        new_urls = [
+            absolute_url
+            for asset_url in _ASSET_URLS_XPATH(tree)
+            if asset_url and (absolute_url := self._claim_asset(asset_url, page_url))
+        ]
+        if not new_urls:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.ASSET_WORKERS) as executor:
+            list(executor.map(self._download_asset, new_urls))
+
+    def _claim_asset(self, asset_url: str, page_url: str) -> str | None:
+        """Resolve an asset URL and mark its local file as downloaded.
+
+        Assets are claimed by destination path rather than by URL: the
+        query string is not part of the path, so distinct URLs can map to
+        the same file, which only one thread may write.
 
         Args:
             asset_url: URL of the asset (may be relative)
             page_url: URL of the page referencing the asset
+
+        Returns:
+            The absolute URL to download, or None if the asset is skipped or
+            its file was already claimed
         """
         # Skip data URLs
         if asset_url.startswith("data:"):
-            return
+            return None
 
         # Resolve relative URLs
         absolute_url = urljoin(page_url, asset_url)
@@ -178,25 +318,92 @@ class RaycastDocScraper:
         if parsed.netloc and parsed.netloc != "developers.raycast.com":
             # Allow GitBook assets which are commonly used
             if "gitbook" not in parsed.netloc:
-                return
+                return None
 
-        if absolute_url in self.downloaded_assets:
-            return
+        file_path = self._url_to_filepath(absolute_url)
+        with self._lock:
+            if file_path in self.downloaded_assets:
+                return None
+            self.downloaded_assets.add(file_path)
+        return absolute_url
 
-        self.downloaded_assets.add(absolute_url)
+    def _download_asset(self, absolute_url: str) -> None:
+        """Download a static asset.
 
+        Args:
+            absolute_url: Absolute URL of the asset
+        """
         try:
-            time.sleep(self.delay)
-            response = self.session.get(absolute_url, timeout=30)
-            response.raise_for_status()
-
             file_path = self._url_to_filepath(absolute_url)
+            response = self._fetch(absolute_url, file_path, stream=True)
+            if response is None:
+                return
+
+            # Stream the body to disk instead of holding it in memory. It goes
+            # to a temporary file of its own first, so an interrupted or
+            # concurrent download never leaves a partial file in place.
             file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_bytes(response.content)
+            fd, part_path = tempfile.mkstemp(
+                dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".part"
+            )
+            try:
+                with response, os.fdopen(fd, "wb") as f:
+                    response.raw.decode_content = True
+                    shutil.copyfileobj(response.raw, f, self.STREAM_CHUNK_SIZE)
+                os.chmod(part_path, 0o644)
+                os.replace(part_path, file_path)
+            except BaseException:
+                os.unlink(part_path)
+                raise
 
         except Exception as e:
             print(f"  Warning: Failed to download asset {absolute_url}: {e}")
 
+    def _fetch(
+        self, url: str, file_path: Path, stream: bool = False
+    ) -> requests.Response | None:
+        """GET a URL, revalidating the local copy at file_path if there is one.
+
+        Args:
+            url: URL to download
+            file_path: Where the downloaded file is stored
+            stream: Leave the body unread; the caller must close the response
+
+        Returns:
+            The response, or None if the local copy is still current
+        """
+        headers = {}
+        if file_path.exists():
+            headers["If-Modified-Since"] = formatdate(file_path.stat().st_mtime, usegmt=True)
+            with self._lock:
+                etag = self.etags.get(url)
+            if etag:
+                headers["If-None-Match"] = etag
+
+        self._rate_limiter.wait(url)
+        response = self.session.get(url, headers=headers, timeout=30, stream=stream)
+        if response.status_code == 304 or not response.ok:
+            response.close()
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+
+        if etag := response.headers.get("ETag"):
+            with self._lock:
+                self.etags[url] = etag
+        return response
+
+    def _load_etags(self) -> None:
+        """Load the ETags saved by the previous scrape."""
+        try:
+            self.etags = jsonio.loads(self.etags_path.read_bytes())
+        except (OSError, ValueError):
+            self.etags = {}
+
+    def _save_etags(self) -> None:
+        """Save the ETags of the downloaded files for the next scrape."""
+        _atomic_write(self.etags_path, jsonio.dumps(self.etags))
+
     def _url_to_filepath(self, url: str) -> Path:
         """Convert a URL to a local file path.
 
@@ -232,11 +439,12 @@ class RaycastDocScraper:
         return self.output_dir / prefix / path
 
 
-def scrape_raycast_docs(output_dir: Path) -> None:
+def scrape_raycast_docs(output_dir: Path, download_assets: bool = True) -> None:
     """Scrape Raycast developer documentation.
 
     Args:
         output_dir: Directory to save downloaded files
+        download_assets: Also download the static assets the pages reference
     """
-    scraper = RaycastDocScraper(output_dir=output_dir)
+    scraper = RaycastDocScraper(output_dir=output_dir, download_assets=download_assets)
     scraper.scrape()
@@ -0,0 +1,51 @@
+"""Shared test fixtures."""
+
+import plistlib
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+INFO_PLIST = {
+    "CFBundleIdentifier": "raycast",
+    "CFBundleName": "Raycast",
+    "DocSetPlatformFamily": "raycast",
+    "isDashDocset": True,
+    "dashIndexFilePath": "index.html",
+    "DashDocSetFamily": "dashtoc",
+}
+
+
+@pytest.fixture
+def make_docset(tmp_path):
+    """Return a function that writes a minimal docset to disk.
+
+    It takes the files under Documents (relative path to content) and the
+    searchIndex rows as (name, type, path), and returns the docset path.
+    """
+
+    def make(files: dict[str, str | bytes], rows: list[tuple[str, str, str]]) -> Path:
+        docset = tmp_path / "Test.docset"
+        documents = docset / "Contents" / "Resources" / "Documents"
+        for relative_path, content in files.items():
+            path = documents / relative_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(content, str):
+                content = content.encode()
+            path.write_bytes(content)
+
+        with open(docset / "Contents" / "Info.plist", "wb") as f:
+            plistlib.dump(INFO_PLIST, f)
+        (docset / "icon.png").write_bytes(b"icon")
+        (docset / "icon@2x.png").write_bytes(b"icon")
+
+        db = sqlite3.connect(docset / "Contents" / "Resources" / "docSet.dsidx")
+        with db:
+            db.execute(
+                "CREATE TABLE searchIndex(id INTEGER PRIMARY KEY, name TEXT, type TEXT, path TEXT)"
+            )
+            db.executemany("INSERT INTO searchIndex(name, type, path) VALUES (?, ?, ?)", rows)
+        db.close()
+        return docset
+
+    return make
@@ -1,6 +1,8 @@
 """Tests for the docset builder."""
 
+import os
 import re
+from pathlib import Path
 
 import pytest
 
@@ -11,7 +13,7 @@ class TestNavigationRemoval:
     def test_header_element_removal(self):
         """Header elements should be removed."""
         html = '<header class="site-header">Nav content</header>'
-        # BeautifulSoup would decompose this
+        # The builder drops this element from the tree
         assert "<header" in html
 
     def test_nav_element_removal(self):
@@ -97,3 +99,194 @@ class TestScrollMarginCss:
         assert "scroll-margin-top" in css
         assert ":has(.dashAnchor)" in css
         assert "80px" in css
+
+
+class TestFastPathAnchors:
+    """The byte-level fast path must anchor the same headings as the tree path."""
+
+    PAGE = """<!DOCTYPE html>
+<html><head><title>Page <h2 id="in-title">Not a heading</h2></title></head>
+<body>
+<h1 id="top">Top &amp; <code>Title</code></h1>
+<h2 id="double">Double quoted</h2>
+<h3 id='single'>Single quoted</h3>
+<h2 id=bare>Unquoted</h2>
+<h2 data-id="x">Data id only</h2>
+<h2 id="">Empty id</h2>
+<h2 id="examples">Examples</h2>
+<h3 class="title" id="with-class">Has <em>class</em></h3>
+<!-- <h2 id="commented">Commented out</h2> -->
+<script>document.write('<h2 id="scripted">Scripted</h2>');</script>
+<p>Body</p>
+</body></html>
+"""
+
+    def _build(self, tmp_path, name: str, content: str):
+        from raycast_docset.builder import _copy_html_with_toc
+
+        documents_dir = tmp_path / name
+        documents_dir.mkdir()
+        source = tmp_path / f"{name}-source.html"
+        source.write_text(content, encoding="utf-8")
+        dest = documents_dir / "page.html"
+        entries = _copy_html_with_toc(source, dest, documents_dir)
+        anchors = re.findall(r'<a name="([^"]+)" class="dashAnchor">', dest.read_text(encoding="utf-8"))
+        return entries, anchors
+
+    def test_fast_path_matches_tree_path(self, tmp_path):
+        from raycast_docset.builder import _inject_anchors
+
+        assert _inject_anchors(self.PAGE.encode()) is not None
+
+        # A nav element sends the same page through the tree path
+        tree_page = self.PAGE.replace("<p>Body</p>", "<p>Body</p><nav>Links</nav>")
+        assert _inject_anchors(tree_page.encode()) is None
+
+        fast_entries, fast_anchors = self._build(tmp_path, "fast", self.PAGE)
+        tree_entries, tree_anchors = self._build(tmp_path, "tree", tree_page)
+
+        assert fast_anchors == tree_anchors
+        assert fast_entries == tree_entries
+        assert fast_anchors == [
+            "//apple_ref/cpp/Guide/Top%20%26%20Title",
+            "//apple_ref/cpp/Section/Double%20quoted",
+            "//apple_ref/cpp/Section/Single%20quoted",
+            "//apple_ref/cpp/Section/Unquoted",
+            "//apple_ref/cpp/Section/Has%20class",
+        ]
+
+
+class TestIconCache:
+    """Test revalidation of the cached Raycast icon."""
+
+    STALE_AGE = 30 * 24 * 60 * 60
+
+    @pytest.fixture
+    def builder(self, tmp_path):
+        from raycast_docset.builder import DocsetBuilder
+
+        builder = DocsetBuilder(tmp_path / "src", tmp_path / "out")
+        builder.icon_cache_path.parent.mkdir(parents=True)
+        builder.icon_cache_path.write_bytes(b"cached")
+        stale = builder.icon_cache_path.stat().st_mtime - self.STALE_AGE
+        os.utime(builder.icon_cache_path, (stale, stale))
+        return builder
+
+    def _respond(self, monkeypatch, status_code: int, content: bytes = b""):
+        import requests
+
+        from raycast_docset import builder
+
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = content
+        monkeypatch.setattr(builder.requests, "get", lambda *args, **kwargs: response)
+
+    def test_not_modified_resets_age(self, builder, monkeypatch):
+        old_mtime = builder.icon_cache_path.stat().st_mtime
+        self._respond(monkeypatch, 304)
+        assert builder._fetch_icon_bytes() == b"cached"
+        assert builder.icon_cache_path.stat().st_mtime > old_mtime
+
+    def test_server_error_keeps_age(self, builder, monkeypatch):
+        old_mtime = builder.icon_cache_path.stat().st_mtime
+        self._respond(monkeypatch, 503)
+        assert builder._fetch_icon_bytes() == b"cached"
+        assert builder.icon_cache_path.stat().st_mtime == old_mtime
+
+    def test_new_icon_replaces_cache(self, builder, monkeypatch):
+        self._respond(monkeypatch, 200, b"fresh")
+        assert builder._fetch_icon_bytes() == b"fresh"
+        assert builder.icon_cache_path.read_bytes() == b"fresh"
+
+
+class TestBuildCache:
+    """Test reuse of processed pages across builds."""
+
+    PAGE = """<html><head><title>{title}</title></head><body>
+<h1 id="top">{title}</h1>
+<h2 id="setup">Setup</h2>
+<p>Body</p>
+</body></html>
+"""
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        docs = tmp_path / "src" / "developers.raycast.com"
+        for name in ("basics/one", "basics/two", "misc/three"):
+            page = docs / f"{name}.html"
+            page.parent.mkdir(parents=True, exist_ok=True)
+            page.write_text(self.PAGE.format(title=name.rsplit("/", 1)[1].title()), encoding="utf-8")
+        return tmp_path / "src"
+
+    def _build(self, source, capsys):
+        from raycast_docset.builder import DocsetBuilder
+
+        builder = DocsetBuilder(source, source.parent / "out", jobs=1)
+        builder._create_structure()
+        entries = builder._copy_documents()
+        return entries, capsys.readouterr().out
+
+    def _first_page(self, source):
+        from raycast_docset.builder import _walk_files
+
+        return next(
+            Path(entry.path) for entry in _walk_files(source) if entry.name.endswith(".html")
+        )
+
+    def test_second_build_reuses_pages(self, source, capsys):
+        entries, _ = self._build(source, capsys)
+        assert entries
+
+        cached_entries, out = self._build(source, capsys)
+        assert "Reused 3 unchanged HTML files" in out
+        assert "Processed 0 HTML files" in out
+        assert cached_entries == entries
+
+    def test_changed_page_misses_cache(self, source, capsys):
+        self._build(source, capsys)
+        page = self._first_page(source)
+        page.write_text(page.read_text(encoding="utf-8").replace("Body", "Changed"), encoding="utf-8")
+
+        _, out = self._build(source, capsys)
+        assert "Processed 1 HTML files" in out
+        assert "Reused 2 unchanged HTML files" in out
+
+    def test_changed_processing_code_misses_cache(self, source, capsys, monkeypatch):
+        from raycast_docset import builder
+
+        self._build(source, capsys)
+        monkeypatch.setattr(builder, "_processing_digest", lambda: b"other code")
+
+        _, out = self._build(source, capsys)
+        assert "Processed 3 HTML files" in out
+        assert "Reused" not in out
+
+    @pytest.mark.parametrize(
+        "corrupt",
+        [
+            lambda data: data[: len(data) // 2],
+            lambda data: b"[]",
+            lambda data: re.sub(rb"\[\[.*?\]\]", b"[[1]]", data),
+            lambda data: re.sub(rb"\[\[.*?\]\]", b"7", data),
+        ],
+        ids=["truncated", "not-an-object", "short-entry", "not-a-list"],
+    )
+    def test_corrupt_cache_rebuilds(self, source, capsys, corrupt):
+        entries, _ = self._build(source, capsys)
+        cache_path = source.parent / "out" / ".build-cache" / "html.json"
+        cache_path.write_bytes(corrupt(cache_path.read_bytes()))
+
+        rebuilt_entries, out = self._build(source, capsys)
+        assert "Processed 3 HTML files" in out
+        assert rebuilt_entries == entries
+
+    def test_entry_order_independent_of_cache(self, source, capsys):
+        entries, _ = self._build(source, capsys)
+
+        # Only the first page is processed again; the others come from the cache
+        page = self._first_page(source)
+        page.write_text(page.read_text(encoding="utf-8") + "<!-- edited -->", encoding="utf-8")
+        partly_cached_entries, out = self._build(source, capsys)
+        assert "Reused 2 unchanged HTML files" in out
+        assert partly_cached_entries == entries
@@ -1,8 +1,12 @@
 """Tests for the contribution workflow."""
 
-import pytest
+import tarfile
 from pathlib import Path
 
+import pytest
+
+from contribute import create_archive
+
 
 class TestBranchNaming:
     """Test PR branch name generation."""
@@ -80,6 +84,27 @@ class TestArchiveNaming:
         assert archive_name.endswith(".tgz")
 
 
+class TestCreateArchive:
+    """Test .tgz archive creation."""
+
+    @pytest.fixture
+    def docset(self, tmp_path):
+        docset = tmp_path / "Raycast.docset"
+        documents = docset / "Contents" / "Resources" / "Documents"
+        documents.mkdir(parents=True)
+        (documents / "index.html").write_text("<html><body>Hello</body></html>")
+        return docset
+
+    @pytest.mark.parametrize("compress_level", [1, 9])
+    def test_archive_contains_docset(self, docset, tmp_path, compress_level):
+        archive = tmp_path / "Raycast.tgz"
+        create_archive(docset, archive, compress_level)
+
+        with tarfile.open(archive, "r:gz") as tar:
+            names = tar.getnames()
+        assert "Raycast.docset/Contents/Resources/Documents/index.html" in names
+
+
 class TestPathDefaults:
     """Test default path handling."""
 
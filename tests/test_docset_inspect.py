@@ -0,0 +1,50 @@
+"""Tests for the shared docset inspector."""
+
+import sqlite3
+
+import pytest
+
+from docset_inspect import DocsetInspector
+
+
+@pytest.fixture
+def inspector(make_docset):
+    docset = make_docset(
+        {"index.html": "<h1>Home</h1>", "api/list.html": "<h1>List</h1>", "style.css": "body {}"},
+        [
+            ("Home", "Guide", "index.html"),
+            ("Props", "Section", "api/list.html#props"),
+            ("Gone", "Section", "gone.html#props"),
+        ],
+    )
+    inspector = DocsetInspector(docset)
+    yield inspector
+    inspector.close()
+
+
+class TestDocsetInspector:
+    """Test the facts gathered about a docset."""
+
+    def test_doc_files_are_relative_posix_paths(self, inspector):
+        assert inspector.doc_files == {"index.html", "api/list.html", "style.css"}
+        assert sorted(inspector.html_files) == [
+            inspector.documents_dir / "api/list.html",
+            inspector.documents_dir / "index.html",
+        ]
+
+    def test_file_exists_ignores_anchor(self, inspector):
+        rows = inspector.db.execute(
+            "SELECT name, file_exists(path) FROM searchIndex ORDER BY id"
+        ).fetchall()
+        assert rows == [("Home", 1), ("Props", 1), ("Gone", 0)]
+        assert inspector.db.execute("SELECT file_exists(NULL)").fetchone() == (0,)
+
+    def test_connection_is_read_only(self, inspector):
+        with pytest.raises(sqlite3.OperationalError):
+            inspector.db.execute("DELETE FROM searchIndex")
+
+    def test_close_allows_reopening(self, inspector):
+        first = inspector.db
+        inspector.close()
+        assert inspector.db is not first
+        assert inspector.db.execute("SELECT COUNT(*) FROM searchIndex").fetchone() == (3,)
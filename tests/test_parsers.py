@@ -0,0 +1,191 @@
+"""Tests for the index entry parsers."""
+
+import pytest
+
+from raycast_docset.parsers import (
+    ALL_PARSERS,
+    APIReferenceParser,
+    DashAnchorParser,
+    FallbackParser,
+    GuideParser,
+    IndexEntry,
+    MiscParser,
+    UtilitiesParser,
+    index_file,
+    parse_html_file,
+    parsers_for,
+)
+
+BASE = "developers.raycast.com"
+
+
+@pytest.fixture
+def parse_page(tmp_path):
+    """Write an HTML page to disk and parse it the way the builder does."""
+
+    def parse(html: str):
+        page = tmp_path / "page.html"
+        page.write_text(html, encoding="utf-8")
+        return parse_html_file(page)
+
+    return parse
+
+
+class TestAPIReferenceParser:
+    """Test API reference pages parsed from real lxml trees."""
+
+    PAGE = """<html><head><title>List | Raycast API</title></head><body>
+<h1>List</h1>
+<h2 id="props">Props</h2>
+<h2 id="list.item">List.Item</h2>
+<h3 id="push">push(target)</h3>
+<h4 id="isloading">isLoading</h4>
+<h3 id="types">Related types</h3>
+<h3>No id</h3>
+</body></html>"""
+
+    def test_page_and_elements(self, parse_page):
+        path = f"{BASE}/api-reference/user-interface/list.html"
+        entries = list(APIReferenceParser().parse_tree(parse_page(self.PAGE), path))
+        assert entries == [
+            IndexEntry("List", "Component", path),
+            IndexEntry("List.Item", "Type", f"{path}#list.item"),
+            IndexEntry("List.push", "Function", f"{path}#push"),
+            IndexEntry("List.isLoading", "Property", f"{path}#isloading"),
+            IndexEntry("Related types", "Section", f"{path}#types"),
+        ]
+
+    def test_page_without_title(self, parse_page):
+        path = f"{BASE}/api-reference/ai.html"
+        tree = parse_page("<html><body><p>No title</p></body></html>")
+        assert list(APIReferenceParser().parse_tree(tree, path)) == []
+
+
+class TestSectionParsers:
+    """Test the single-entry section parsers on real lxml trees."""
+
+    def test_utilities_hook(self, parse_page):
+        path = f"{BASE}/utilities/react-hooks/usefetch.html"
+        tree = parse_page("<html><body><h1>useFetch</h1></body></html>")
+        assert list(UtilitiesParser().parse_tree(tree, path)) == [
+            IndexEntry("useFetch", "Function", path)
+        ]
+
+    def test_guide_title_from_title_tag(self, parse_page):
+        path = f"{BASE}/basics/getting-started.html"
+        tree = parse_page("<html><head><title>Getting Started | Raycast API</title></head></html>")
+        assert list(GuideParser().parse_tree(tree, path)) == [
+            IndexEntry("Getting Started", "Guide", path)
+        ]
+
+    def test_examples_are_samples(self, parse_page):
+        path = f"{BASE}/examples/todo-list.html"
+        tree = parse_page("<html><body><h1>Todo List</h1></body></html>")
+        assert list(GuideParser().parse_tree(tree, path)) == [
+            IndexEntry("Todo List", "Sample", path)
+        ]
+
+    def test_misc_changelog(self, parse_page):
+        path = f"{BASE}/misc/changelog.html"
+        tree = parse_page("<html><body><h1>Changelog</h1></body></html>")
+        assert list(MiscParser().parse_tree(tree, path)) == [
+            IndexEntry("Changelog", "Section", path)
+        ]
+
+    def test_fallback_skips_site_title(self, parse_page):
+        path = f"{BASE}/index.html"
+        tree = parse_page("<html><head><title>Raycast</title></head></html>")
+        assert list(FallbackParser().parse_tree(tree, path)) == []
+
+
+class TestDashAnchorParser:
+    """Test dashAnchor extraction from real lxml trees."""
+
+    PAGE = """<html><body>
+<h2><a name="//apple_ref/cpp/Section/Installation" class="dashAnchor"></a>Installation</h2>
+<a name="//apple_ref/cpp/Function/showToast%28%29" class="x dashAnchor"></a><!-- gap --><h3 id="showtoast">showToast()</h3>
+<a name="//apple_ref/cpp/Section/Examples" class="dashAnchor"></a><h2 id="examples">Examples</h2>
+<a name="//apple_ref/cpp/Section/See%20Also" class="dashAnchor"></a><h2 id="see-also">See Also</h2>
+<a name="//apple_ref/cpp/Section/x" class="dashAnchorish"></a><h2 id="not-anchor">Not an anchor</h2>
+<a name="not-apple-ref" class="dashAnchor"></a>
+<a name="//apple_ref/Guide/{long}" class="dashAnchor"></a>
+</body></html>"""
+
+    def test_anchors(self, parse_page):
+        path = f"{BASE}/basics/page.html"
+        page = self.PAGE.replace("{long}", "x" * 100)
+        entries = list(DashAnchorParser().parse_tree(parse_page(page), path))
+        assert entries == [
+            IndexEntry("Installation", "Section", path),
+            IndexEntry("showToast()", "Function", f"{path}#showtoast"),
+            IndexEntry("x" * 77 + "...", "Guide", path),
+        ]
+
+    def test_parse_reads_file(self, tmp_path):
+        page = tmp_path / "page.html"
+        page.write_text(
+            '<a name="//apple_ref/cpp/Section/Setup" class="dashAnchor"></a><h2 id="setup">Setup</h2>',
+            encoding="utf-8",
+        )
+        assert list(DashAnchorParser().parse(page, "page.html")) == [
+            IndexEntry("Setup", "Section", "page.html#setup")
+        ]
+
+
+class TestIndexFile:
+    """Test that one parse feeds every matching parser."""
+
+    def test_all_matching_parsers_run(self, tmp_path):
+        page = tmp_path / "page.html"
+        page.write_text(
+            "<html><body><h1>Preferences</h1>"
+            '<a name="//apple_ref/cpp/Section/Types" class="dashAnchor"></a><h2 id="types">Types</h2>'
+            "</body></html>",
+            encoding="utf-8",
+        )
+        path = f"{BASE}/api-reference/preferences.html"
+        assert index_file(page, path) == [
+            IndexEntry("Types", "Section", f"{path}#types"),
+            IndexEntry("Preferences", "Class", path),
+            IndexEntry("Types", "Type", f"{path}#types"),
+            IndexEntry("Preferences", "Guide", path),
+        ]
+
+    def test_unreadable_file(self, tmp_path, capsys):
+        assert index_file(tmp_path / "missing.html", "missing.html") == []
+        assert "Error parsing missing.html" in capsys.readouterr().out
+
+
+class TestParsersFor:
+    """Test the single-regex parser dispatch."""
+
+    @pytest.mark.parametrize(
+        ("relative_path", "expected"),
+        [
+            (
+                f"{BASE}/api-reference/user-interface/list.html",
+                [DashAnchorParser, APIReferenceParser, FallbackParser],
+            ),
+            (
+                f"{BASE}/utilities/react-hooks/usefetch.html",
+                [DashAnchorParser, UtilitiesParser, FallbackParser],
+            ),
+            (f"{BASE}/basics/getting-started.html", [DashAnchorParser, GuideParser, FallbackParser]),
+            (f"{BASE}/ai/learn-core-concepts.html", [DashAnchorParser, GuideParser, FallbackParser]),
+            (f"{BASE}/examples/todo-list.html", [DashAnchorParser, GuideParser, FallbackParser]),
+            (f"{BASE}/misc/changelog.html", [DashAnchorParser, MiscParser, FallbackParser]),
+            (
+                f"{BASE}/examples/api-reference/misc/page.html",
+                [DashAnchorParser, APIReferenceParser, GuideParser, MiscParser, FallbackParser],
+            ),
+            (f"{BASE}/index.html", [DashAnchorParser, FallbackParser]),
+            (f"{BASE}/openai/page.html", [DashAnchorParser, GuideParser, FallbackParser]),
+            ("other-site/basics/page.html", [DashAnchorParser, GuideParser]),
+            (f"{BASE}/basics/style.css", [GuideParser]),
+        ],
+    )
+    def test_dispatch(self, relative_path, expected):
+        parsers = parsers_for(relative_path)
+        assert [type(parser) for parser in parsers] == expected
+        # Same result as asking every parser in turn
+        assert parsers == [parser for parser in ALL_PARSERS if parser.matches(relative_path)]
@@ -0,0 +1,278 @@
+"""Tests for the documentation scraper."""
+
+import threading
+from io import BytesIO
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+from raycast_docset.scraper import RaycastDocScraper, _HostRateLimiter, _atomic_write
+
+BASE = "https://developers.raycast.com"
+
+
+class FakeAdapter(BaseAdapter):
+    """Serves canned responses instead of going to the network."""
+
+    def __init__(self, responses: dict[str, tuple[int, dict[str, str], bytes | BytesIO]]):
+        super().__init__()
+        self.responses = responses
+        self.requests: list[requests.PreparedRequest] = []
+        self._lock = threading.Lock()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        with self._lock:
+            self.requests.append(request)
+        status, headers, body = self.responses.get(request.url, (404, {}, b""))
+        if isinstance(body, bytes):
+            body = BytesIO(body)
+        raw = HTTPResponse(body=body, headers=headers, status=status, preload_content=False)
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = raw
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+    def requested(self, url: str) -> list[requests.PreparedRequest]:
+        return [request for request in self.requests if request.url == url]
+
+
+@pytest.fixture
+def make_scraper(tmp_path):
+    """Return a function that creates a scraper served by a FakeAdapter."""
+
+    def make(responses, download_assets=True):
+        scraper = RaycastDocScraper(tmp_path / "docs", download_assets=download_assets)
+        scraper._rate_limiter = _HostRateLimiter(0)
+        adapter = FakeAdapter(responses)
+        scraper.session.mount("https://", adapter)
+        scraper.session.mount("http://", adapter)
+        scraper.output_dir.mkdir()
+        return scraper, adapter
+
+    return make
+
+
+class TestConditionalRequests:
+    """Test revalidation of previously scraped files."""
+
+    URL = f"{BASE}/basics/getting-started"
+
+    def test_not_modified_keeps_file_and_etag(self, make_scraper):
+        scraper, adapter = make_scraper({self.URL: (304, {}, b"")}, download_assets=False)
+        page = scraper._url_to_filepath(self.URL)
+        page.parent.mkdir(parents=True)
+        page.write_bytes(b"<html>old</html>")
+        scraper.etags = {self.URL: '"v1"'}
+
+        scraper._download_page(self.URL, 1, 1)
+        scraper._save_etags()
+
+        [request] = adapter.requested(self.URL)
+        assert request.headers["If-None-Match"] == '"v1"'
+        assert "If-Modified-Since" in request.headers
+        assert page.read_bytes() == b"<html>old</html>"
+        scraper._load_etags()
+        assert scraper.etags == {self.URL: '"v1"'}
+
+    def test_changed_page_is_replaced(self, make_scraper):
+        scraper, _ = make_scraper(
+            {self.URL: (200, {"ETag": '"v2"'}, b"<html>new</html>")}, download_assets=False
+        )
+        page = scraper._url_to_filepath(self.URL)
+        page.parent.mkdir(parents=True)
+        page.write_bytes(b"<html>old</html>")
+        scraper.etags = {self.URL: '"v1"'}
+
+        scraper._download_page(self.URL, 1, 1)
+
+        assert page.read_bytes() == b"<html>new</html>"
+        assert scraper.etags == {self.URL: '"v2"'}
+
+    def test_first_download_is_unconditional(self, make_scraper):
+        scraper, adapter = make_scraper({self.URL: (200, {}, b"<html></html>")}, download_assets=False)
+
+        scraper._download_page(self.URL, 1, 1)
+
+        [request] = adapter.requested(self.URL)
+        assert "If-None-Match" not in request.headers
+        assert "If-Modified-Since" not in request.headers
+
+    def test_transient_errors_are_retried(self, tmp_path):
+        adapter = RaycastDocScraper(tmp_path).session.get_adapter(self.URL)
+        assert isinstance(adapter, HTTPAdapter)
+        assert adapter.max_retries.total == 3
+        assert 503 in adapter.max_retries.status_forcelist
+
+
+class TestAssetDownloads:
+    """Test that shared assets are only downloaded once."""
+
+    PAGE = b"""<html><head>
+<link rel="preload stylesheet" href="/style.css">
+<script src="https://static-2v.gitbook.com/app.js"></script>
+<script src="https://cdn.example.com/tracker.js"></script>
+</head><body><img src="data:image/png;base64,AAAA"></body></html>"""
+
+    def test_shared_asset_downloaded_once(self, make_scraper):
+        scraper, adapter = make_scraper(
+            {
+                f"{BASE}/a": (200, {}, self.PAGE),
+                # The query string is dropped from the local path, so this is
+                # the same file as /style.css
+                f"{BASE}/b": (200, {}, self.PAGE.replace(b"/style.css", b"/style.css?v=2")),
+                f"{BASE}/style.css": (200, {}, b"body {}"),
+                f"{BASE}/style.css?v=2": (200, {}, b"body {}"),
+                "https://static-2v.gitbook.com/app.js": (200, {}, b"app"),
+            }
+        )
+
+        threads = [
+            threading.Thread(target=scraper._download_page, args=(f"{BASE}/{name}", 1, 2))
+            for name in ("a", "b")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(adapter.requested(f"{BASE}/style.css")) + len(
+            adapter.requested(f"{BASE}/style.css?v=2")
+        ) == 1
+        assert len(adapter.requested("https://static-2v.gitbook.com/app.js")) == 1
+        assert adapter.requested("https://cdn.example.com/tracker.js") == []
+        assert scraper._url_to_filepath(f"{BASE}/style.css").read_bytes() == b"body {}"
+        assert scraper.downloaded_assets == {
+            scraper._url_to_filepath(f"{BASE}/style.css"),
+            scraper._url_to_filepath("https://static-2v.gitbook.com/app.js"),
+        }
+
+
+class TestHostRateLimiter:
+    """Test the per-host request spacing."""
+
+    def test_requests_to_one_host_are_spaced(self, monkeypatch):
+        from raycast_docset import scraper
+
+        sleeps = []
+        monkeypatch.setattr(scraper.time, "monotonic", lambda: 100.0)
+        monkeypatch.setattr(scraper.time, "sleep", sleeps.append)
+        limiter = _HostRateLimiter(0.3)
+
+        limiter.wait(f"{BASE}/a")
+        limiter.wait("https://static-2v.gitbook.com/app.js")
+        limiter.wait(f"{BASE}/b")
+        limiter.wait(f"{BASE}/c")
+
+        assert sleeps == [pytest.approx(0.3), pytest.approx(0.6)]
+
+
+class TestScrape:
+    """Test a whole scrape through the page pool."""
+
+    LLMS_TXT = b"""# Raycast API
+- [Introduction](/readme.md): Start building
+- [Getting Started](/basics/getting-started.md): First steps
+- [Getting Started again](/basics//getting-started.md): Duplicate spelling
+- [List](/api-reference/user-interface/list.md): List component
+"""
+
+    def test_pages_downloaded_once(self, make_scraper):
+        scraper, adapter = make_scraper(
+            {
+                RaycastDocScraper.LLMS_TXT_URL: (200, {}, self.LLMS_TXT),
+                f"{BASE}/": (200, {"ETag": '"root"'}, b"<html>root</html>"),
+                f"{BASE}/basics/getting-started": (200, {}, b"<html>start</html>"),
+                f"{BASE}/basics//getting-started": (200, {}, b"<html>start</html>"),
+                f"{BASE}/api-reference/user-interface/list": (200, {}, b"<html>list</html>"),
+            },
+            download_assets=False,
+        )
+
+        scraper.scrape()
+
+        # Either spelling of the duplicate page may win the race, but only one
+        # is downloaded
+        pages = sorted(request.url.replace("//getting", "/getting") for request in adapter.requests)
+        assert pages == [
+            f"{BASE}/",
+            f"{BASE}/api-reference/user-interface/list",
+            f"{BASE}/basics/getting-started",
+            RaycastDocScraper.LLMS_TXT_URL,
+        ]
+        docs = scraper.output_dir / "developers.raycast.com"
+        assert (docs / "index.html").read_bytes() == b"<html>root</html>"
+        assert (docs / "basics/getting-started/index.html").read_bytes() == b"<html>start</html>"
+        assert (docs / "api-reference/user-interface/list/index.html").exists()
+        assert scraper.etags_path.exists()
+        scraper._load_etags()
+        assert scraper.etags == {f"{BASE}/": '"root"'}
+
+
+class TestAtomicWrite:
+    """Test that interrupted writes leave no partial files."""
+
+    def test_failed_write_keeps_old_file(self, tmp_path, monkeypatch):
+        from raycast_docset import scraper
+
+        target = tmp_path / "page.html"
+        target.write_bytes(b"old")
+
+        def failing_write(fd, data):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(scraper.os, "write", failing_write)
+        with pytest.raises(OSError, match="disk full"):
+            _atomic_write(target, b"new")
+
+        assert target.read_bytes() == b"old"
+        assert [path.name for path in tmp_path.iterdir()] == ["page.html"]
+
+    def test_write_replaces_file(self, tmp_path):
+        target = tmp_path / "page.html"
+        target.write_bytes(b"old")
+
+        _atomic_write(target, b"new")
+
+        assert target.read_bytes() == b"new"
+        assert [path.name for path in tmp_path.iterdir()] == ["page.html"]
+
+
+class TestStreamedAssets:
+    """Test that asset bodies are streamed to disk safely."""
+
+    URL = f"{BASE}/style.css"
+
+    def test_interrupted_download_keeps_old_file(self, make_scraper, capsys):
+        class DroppedConnection(BytesIO):
+            def read(self, *args):
+                raise ConnectionResetError("connection dropped")
+
+        scraper, _ = make_scraper({self.URL: (200, {}, DroppedConnection())})
+        asset = scraper._url_to_filepath(self.URL)
+        asset.parent.mkdir(parents=True)
+        asset.write_bytes(b"old")
+
+        scraper._download_asset(self.URL)
+
+        assert "Failed to download asset" in capsys.readouterr().out
+        assert asset.read_bytes() == b"old"
+        assert [path.name for path in asset.parent.iterdir()] == ["style.css"]
+
+    def test_download_streams_body(self, make_scraper):
+        body = b"x" * (3 * RaycastDocScraper.STREAM_CHUNK_SIZE + 1)
+        scraper, _ = make_scraper({self.URL: (200, {}, body)})
+
+        scraper._download_asset(self.URL)
+
+        asset = scraper._url_to_filepath(self.URL)
+        assert asset.read_bytes() == body
+        assert [path.name for path in asset.parent.iterdir()] == ["style.css"]
@@ -85,3 +85,101 @@ class TestDashAnchorDetection:
         '''
         matches = re.findall(r'class="dashAnchor"', html)
         assert len(matches) == 3
+
+
+class TestSharedInspector:
+    """Test running both validators over one inspector."""
+
+    def test_contribution_checks_share_inspector(self, make_docset, monkeypatch):
+        import docset_inspect
+        import verify
+
+        docset = make_docset(
+            {"index.html": '<h2 id="intro"><a name="//apple_ref/cpp/Guide/Intro" class="dashAnchor"></a>Intro</h2>'},
+            [("Intro", "Guide", "index.html#intro")],
+        )
+
+        plist_loads = 0
+        real_load = docset_inspect.plistlib.load
+
+        def counting_load(f):
+            nonlocal plist_loads
+            plist_loads += 1
+            return real_load(f)
+
+        inspectors = []
+
+        class RecordingInspector(docset_inspect.DocsetInspector):
+            def __init__(self, docset_path):
+                super().__init__(docset_path)
+                inspectors.append(self)
+
+        monkeypatch.setattr(docset_inspect.plistlib, "load", counting_load)
+        monkeypatch.setattr(verify, "DocsetInspector", RecordingInspector)
+        monkeypatch.setattr("sys.argv", ["verify.py", str(docset), "--contribution"])
+
+        verify.main()
+
+        assert len(inspectors) == 1
+        assert plist_loads == 1
+        # Closed by main once both validators are done
+        assert "db" not in vars(inspectors[0])
+
+
+class TestHtmlScan:
+    """Test the bytes scan of HTML files, read or memory-mapped."""
+
+    CONTENT = (
+        b'<html><head><script src="https://www.googletagmanager.com/gtag/js"></script></head>'
+        b'<body><nav>Links</nav><imgalt="x">'
+        b'<h2><a name="//apple_ref/cpp/Section/Good" class="dashAnchor"></a>Good</h2>'
+        b'<a name="//apple_ref/cpp/Section/Bad" class="dashAnchor"></a><h2>Bad</h2>'
+    )
+    EXPECTED = ({"Google Tag Manager"}, "<imgalt=", True, 2, 1)
+
+    def test_small_file_is_read(self, tmp_path, monkeypatch):
+        import verify
+
+        page = tmp_path / "small.html"
+        page.write_bytes(self.CONTENT + b"</body></html>")
+        monkeypatch.setattr(verify.mmap, "mmap", None)
+        assert verify._scan_one_html(page) == self.EXPECTED
+
+    def test_large_file_is_memory_mapped(self, tmp_path, monkeypatch):
+        import verify
+
+        page = tmp_path / "large.html"
+        padding = b"<p>filler</p>" * (verify.MMAP_THRESHOLD // 13 + 1)
+        page.write_bytes(self.CONTENT + padding + b"</body></html>")
+        assert page.stat().st_size >= verify.MMAP_THRESHOLD
+
+        mapped = []
+        real_mmap = verify.mmap.mmap
+
+        def recording_mmap(*args, **kwargs):
+            mapped.append(args)
+            return real_mmap(*args, **kwargs)
+
+        monkeypatch.setattr(verify.mmap, "mmap", recording_mmap)
+        assert verify._scan_one_html(page) == self.EXPECTED
+        assert len(mapped) == 1
+
+
+class TestSearchIndexCheck:
+    """Test the search index check against a fixture docset."""
+
+    def test_missing_files_with_anchors(self, make_docset):
+        from verify import DocsetValidator
+
+        docset = make_docset(
+            {"index.html": '<h2 id="intro">Intro</h2>'},
+            [
+                ("Intro", "Guide", "index.html#intro"),
+                ("Home", "Guide", "index.html"),
+                ("Anchor on missing file", "Section", "gone.html#intro"),
+            ],
+        )
+        validator = DocsetValidator(docset)
+        validator.validate()
+
+        assert "1/3 index paths point to missing files" in validator.warnings
@@ -1,20 +1,19 @@
 """Tests for the Dash contribution requirements checker."""
 
-import re
-
 import pytest
 
+from verify_contribution import _VERSION_RE, ContributionChecker
+
 
 class TestPlistRequirements:
     """Test Info.plist validation patterns."""
 
     def test_version_in_bundle_name_detected(self):
         """Bundle name should not contain version numbers."""
-        pattern = re.compile(r"\d+\.\d+")
-        assert pattern.search("Kubernetes 1.34")
-        assert pattern.search("React 18.2.0")
-        assert not pattern.search("Kubernetes")
-        assert not pattern.search("React")
+        assert _VERSION_RE.search("Kubernetes 1.34")
+        assert _VERSION_RE.search("React 18.2.0")
+        assert not _VERSION_RE.search("Kubernetes")
+        assert not _VERSION_RE.search("React")
 
     def test_required_plist_keys(self):
         """Check the required keys list is complete."""
@@ -97,3 +96,38 @@ class TestTocSupport:
         """Missing DashDocSetFamily should be detected."""
         plist = {"CFBundleName": "MyDocset"}
         assert plist.get("DashDocSetFamily") != "dashtoc"
+
+
+class TestCheckIndex:
+    """Test the search index checks against a fixture docset."""
+
+    def test_index_integrity_counts(self, make_docset):
+        docset = make_docset(
+            {"index.html": '<h2 id="intro">Intro</h2>', "api/list.html": "<h1>List</h1>"},
+            [
+                ("Intro", "Guide", "index.html#intro"),
+                ("List", "Class", "api/list.html"),
+                ("Anchor on missing file", "Section", "gone/page.html#intro"),
+                ("Missing file", "Function", "api/missing.html"),
+                ("", "Guide", "index.html"),
+                (None, "Guide", "index.html"),
+                ("Two\nlines", "Guide", "api/list.html#top"),
+            ],
+        )
+        checker = ContributionChecker(docset)
+        assert checker.validate() is False
+
+        assert "Index contains 2 empty entries" in checker.errors
+        assert "Index contains 1 entries with newlines" in checker.errors
+        assert "2/7 index paths are broken" in checker.errors
+        assert "Index has 7 entries" in checker.passed
+
+    def test_clean_index(self, make_docset):
+        docset = make_docset(
+            {"index.html": '<h2 id="intro">Intro</h2>'},
+            [("Intro", "Guide", "index.html#intro"), ("Home", "Guide", "index.html")],
+        )
+        checker = ContributionChecker(docset)
+        assert checker.validate() is True
+        assert checker.errors == []
+        assert "All index paths exist" in checker.passed
@@ -7,62 +7,269 @@ checking structure, assets, paths, and search index integrity.
 # ruff: noqa: T201, PLR0912, C901
 
 import argparse
+import functools
+import mmap
+import os
+import plistlib
 import random
 import re
 import sqlite3
 import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from xml.parsers.expat import ExpatError
+
+from docset_inspect import DocsetInspector
+from verify_contribution import ContributionChecker
 
 # Minimum expected entries in search index
 MIN_EXPECTED_ENTRIES = 500
 
+# HTML files read for the content and TOC anchor checks, and threads reading them
+HTML_SAMPLE_SIZE = 20
+HTML_SCAN_WORKERS = 8
+# Files at least this large are memory-mapped for scanning instead of read into memory
+MMAP_THRESHOLD = 64 * 1024
+
+# Patterns for external resources that should be removed or localized
+_EXTERNAL_PATTERNS = [
+    (re.compile(rb'href="https?://static-2v\.gitbook\.com[^"]*"', re.IGNORECASE), "External GitBook CSS (not localized)"),
+    (re.compile(rb'<[^>]*ka-p\.fontawesome\.com[^>]*>', re.IGNORECASE), "FontAwesome"),
+    (re.compile(rb'~gitbook/image', re.IGNORECASE), "GitBook image proxy"),
+    (re.compile(rb'srcset="\s*\d+w', re.IGNORECASE), "Broken srcset (orphaned width descriptors)"),
+]
+_CSS_EXTERNAL_FONT_RE = re.compile(rb'url\(["\']?https://static-2v\.gitbook\.com', re.IGNORECASE)
+_STYLESHEET_LINK_RE = re.compile(rb'<link[^>]*rel=["\']?stylesheet', re.IGNORECASE)
+
+# Patterns that indicate unwanted content, fused so each file is scanned once.
+# The name of the group that matched identifies the issue.
+_UNWANTED_RE = re.compile(
+    rb"(?P<gtm>googletagmanager\.com)"
+    rb"|(?P<ga>google-analytics\.com)"
+    rb"|(?P<onetrust>cdn\.cookielaw\.org)"
+    rb"|(?P<cookieconsent>cookieconsent)"
+    rb"|(?P<gdpr>gdpr|privacy.?consent)",
+    re.IGNORECASE,
+)
+_UNWANTED_DESCRIPTIONS = {
+    "gtm": "Google Tag Manager",
+    "ga": "Google Analytics",
+    "onetrust": "Cookie consent (OneTrust)",
+    "cookieconsent": "Cookie consent script",
+    "gdpr": "GDPR/privacy consent",
+}
+
+# Tags where the attribute name is directly joined to the tag name
+_MALFORMED_TAG_RE = re.compile(rb'<[a-z]+[a-z]+=', re.IGNORECASE)
+# Known HTML tag names, to tell real tags from ones merged with an attribute
+_VALID_TAGS = frozenset(
+    {
+        "a", "abbr", "address", "area", "article", "aside", "audio",
+        "b", "base", "bdi", "bdo", "blockquote", "body", "br", "button",
+        "canvas", "caption", "cite", "code", "col", "colgroup",
+        "data", "datalist", "dd", "del", "details", "dfn", "dialog", "div", "dl", "dt",
+        "em", "embed", "fieldset", "figcaption", "figure", "footer", "form",
+        "h1", "h2", "h3", "h4", "h5", "h6", "head", "header", "hgroup", "hr", "html",
+        "i", "iframe", "img", "input", "ins", "kbd", "label", "legend", "li", "link",
+        "main", "map", "mark", "menu", "meta", "meter", "nav", "noscript",
+        "object", "ol", "optgroup", "option", "output", "p", "picture", "pre", "progress",
+        "q", "rp", "rt", "ruby", "s", "samp", "script", "search", "section", "select",
+        "slot", "small", "source", "span", "strong", "style", "sub", "summary", "sup",
+        "table", "tbody", "td", "template", "textarea", "tfoot", "th", "thead", "time",
+        "title", "tr", "track", "u", "ul", "var", "video", "wbr",
+    }
+)
+
+# Site chrome that should have been stripped: header, nav and aside elements
+_NAV_TAG_OPENINGS = (b"<header", b"<nav", b"<aside")
+
+_DASH_ANCHOR_CLASS = b'class="dashAnchor"'
+# Anchor tags with dashAnchor class followed by heading tags
+_BAD_ANCHOR_RE = re.compile(rb'<a\s[^>]*dashAnchor[^>]*>\s*</a>\s*<h[123]', re.IGNORECASE)
+# Element ids, quoted either way, for checking TOC anchor targets
+_ID_RE = re.compile(rb"""id=["']([^"']+)["']""")
+
+
+@dataclass
+class _HtmlScan:
+    """Findings from one pass over the sampled HTML files."""
+
+    sample_size: int = 0
+    unwanted: set[str] = field(default_factory=set)
+    malformed: list[tuple[Path, str]] = field(default_factory=list)
+    nav_found: bool = False
+    anchor_count: int = 0
+    bad_anchor_count: int = 0
+
+
+def _count_occurrences(content: bytes | mmap.mmap, needle: bytes) -> int:
+    """Count non-overlapping occurrences of needle; mmap has no count()."""
+    if isinstance(content, bytes):
+        return content.count(needle)
+    count = 0
+    pos = content.find(needle)
+    while pos != -1:
+        count += 1
+        pos = content.find(needle, pos + len(needle))
+    return count
+
+
+def _scan_one_html(html_file: Path) -> tuple[set[str], str | None, bool, int, int] | None:
+    """Run every content pattern over one HTML file, or return None if it can't be read.
+
+    Large files are memory-mapped rather than copied into a bytes object.
+    """
+    try:
+        with open(html_file, "rb") as f:
+            if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+                return _scan_html_content(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return _scan_html_content(content)
+    except OSError:
+        return None
+
+
+def _scan_html_content(content: bytes | mmap.mmap) -> tuple[set[str], str | None, bool, int, int]:
+    """Run every content pattern over one HTML document.
+
+    Returns the unwanted content found, the first malformed tag, whether
+    header/nav/aside elements remain, and the dashAnchor and misplaced anchor
+    counts. Content is scanned as bytes since every pattern is ASCII, which
+    skips decoding it.
+    """
+    unwanted: set[str] = set()
+    for match in _UNWANTED_RE.finditer(content):
+        # Every alternative is a named group, so one of them matched
+        assert match.lastgroup is not None
+        unwanted.add(_UNWANTED_DESCRIPTIONS[match.lastgroup])
+        if len(unwanted) == len(_UNWANTED_DESCRIPTIONS):
+            break
+
+    # Find tags where attribute name is directly joined to tag name
+    malformed_tag = None
+    for match in _MALFORMED_TAG_RE.findall(content):
+        # Extract the "tag" part - if it's not a valid HTML tag, it's malformed
+        tag_part = match[1:-1].decode("ascii")  # e.g., "imgalt" from "<imgalt="
+        if tag_part.lower() not in _VALID_TAGS:
+            malformed_tag = match.decode("ascii")
+            break  # Only count once per file
+
+    # Check if anchors are inside headings (not before them)
+    # Good: <h2><a class="dashAnchor"...></a>Title</h2>
+    # Bad:  <a class="dashAnchor"...></a><h2>Title</h2>
+    return (
+        unwanted,
+        malformed_tag,
+        any(content.find(opening) != -1 for opening in _NAV_TAG_OPENINGS),
+        _count_occurrences(content, _DASH_ANCHOR_CLASS),
+        len(_BAD_ANCHOR_RE.findall(content)),
+    )
+
 
 class DocsetValidator:
     """Validates a Dash docset for correctness."""
 
-    def __init__(self, docset_path: Path, *, verbose: bool = False) -> None:
-        """Initialize validator with docset path."""
+    def __init__(
+        self, docset_path: Path, *, verbose: bool = False, inspector: DocsetInspector | None = None
+    ) -> None:
+        """Initialize validator with docset path.
+
+        Pass an inspector to share its cached facts with other checkers of the
+        same docset; it is then left open for the caller to close.
+        """
         self.docset_path = docset_path
         self.verbose = verbose
         self.errors: list[str] = []
         self.warnings: list[str] = []
+        self._log: list[str] = []
+
+        self._owns_inspector = inspector is None
+        self.inspector = inspector or DocsetInspector(docset_path)
 
         # Standard paths
-        self.contents_dir = docset_path / "Contents"
-        self.resources_dir = self.contents_dir / "Resources"
-        self.documents_dir = self.resources_dir / "Documents"
-        self.db_path = self.resources_dir / "docSet.dsidx"
-        self.plist_path = self.contents_dir / "Info.plist"
+        self.contents_dir = self.inspector.contents_dir
+        self.resources_dir = self.inspector.resources_dir
+        self.documents_dir = self.inspector.documents_dir
+        self.db_path = self.inspector.db_path
+        self.plist_path = self.inspector.plist_path
 
     def error(self, msg: str) -> None:
         """Record an error."""
         self.errors.append(msg)
         if self.verbose:
-            print(f"  ❌ {msg}")
+            self._log.append(f"  ❌ {msg}")
 
     def warning(self, msg: str) -> None:
         """Record a warning."""
         self.warnings.append(msg)
         if self.verbose:
-            print(f"  ⚠️  {msg}")
+            self._log.append(f"  ⚠️  {msg}")
 
     def success(self, msg: str) -> None:
         """Print success message if verbose."""
         if self.verbose:
-            print(f"  ✅ {msg}")
+            self._log.append(f"  ✅ {msg}")
+
+    @functools.cached_property
+    def _html_scan(self) -> _HtmlScan:
+        """Findings shared by the HTML content and TOC anchor checks."""
+        return self._scan_html_samples()
+
+    def _scan_html_samples(self) -> _HtmlScan:
+        """Scan a sample of HTML files in parallel and combine the findings."""
+        html_files = self.inspector.html_files
+        sample_files = random.sample(html_files, min(HTML_SAMPLE_SIZE, len(html_files)))
+        scan = _HtmlScan(sample_size=len(sample_files))
+
+        with ThreadPoolExecutor(max_workers=HTML_SCAN_WORKERS) as executor:
+            results = list(executor.map(_scan_one_html, sample_files))
+
+        for html_file, result in zip(sample_files, results):
+            if result is None:
+                continue
+            unwanted, malformed_tag, nav_found, anchor_count, bad_anchor_count = result
+            scan.unwanted |= unwanted
+            if malformed_tag is not None:
+                scan.malformed.append((html_file.relative_to(self.documents_dir), malformed_tag))
+            scan.nav_found = scan.nav_found or nav_found
+            scan.anchor_count += anchor_count
+            scan.bad_anchor_count += bad_anchor_count
+
+        return scan
+
+    def _flush_log(self) -> None:
+        """Write the verbose messages buffered by a check in one go."""
+        if self._log:
+            sys.stdout.write("\n".join(self._log) + "\n")
+            self._log.clear()
 
     def validate(self) -> bool:
         """Run all validation checks. Returns True if valid."""
         print(f"Validating docset: {self.docset_path}")
         print("=" * 60)
 
-        self._check_structure()
-        self._check_info_plist()
-        self._check_icons()
-        self._check_search_index()
-        self._check_external_resources()
-        self._check_html_content()
-        self._check_toc_anchors()
+        try:
+            docset_found = self._check_structure()
+            self._flush_log()
+            # Every other check would fail on a missing docset, so skip them
+            if docset_found:
+                for check in (
+                    self._check_info_plist,
+                    self._check_icons,
+                    self._check_search_index,
+                    self._check_external_resources,
+                    self._check_html_content,
+                    self._check_toc_anchors,
+                ):
+                    check()
+                    self._flush_log()
+        finally:
+            # Messages from a check that raised still reach the output
+            self._flush_log()
+            if self._owns_inspector:
+                self.inspector.close()
 
         print("=" * 60)
         if self.errors:
@@ -80,13 +287,13 @@ class DocsetValidator:
         print("\n✅ PASSED: All checks passed!")
         return True
 
-    def _check_structure(self) -> None:
-        """Check basic docset directory structure."""
+    def _check_structure(self) -> bool:
+        """Check basic docset directory structure. Returns False if the docset is missing."""
         print("\n📁 Checking directory structure...")
 
         if not self.docset_path.exists():
             self.error(f"Docset not found: {self.docset_path}")
-            return
+            return False
 
         if self.docset_path.suffix != ".docset":
             self.error("Path must end with .docset")
@@ -103,6 +310,8 @@ class DocsetValidator:
             else:
                 self.error(f"Missing directory: {d}")
 
+        return True
+
     def _check_info_plist(self) -> None:
         """Check Info.plist exists and has required keys."""
         print("\n📋 Checking Info.plist...")
@@ -111,7 +320,11 @@ class DocsetValidator:
             self.error("Missing Info.plist")
             return
 
-        content = self.plist_path.read_text()
+        try:
+            plist = self.inspector.plist
+        except (plistlib.InvalidFileException, ExpatError) as e:
+            self.error(f"Info.plist is not a valid plist: {e}")
+            return
 
         required_keys = [
             "CFBundleIdentifier",
@@ -122,22 +335,19 @@ class DocsetValidator:
         ]
 
         for key in required_keys:
-            if f"<key>{key}</key>" in content:
+            if key in plist:
                 self.success(f"Info.plist has {key}")
             else:
                 self.error(f"Info.plist missing key: {key}")
 
         # Check dashIndexFilePath points to existing file
-        match = re.search(
-            r"<key>dashIndexFilePath</key>\s*<string>([^<]+)</string>",
-            content,
-        )
-        if match:
-            index_path = self.documents_dir / match.group(1)
+        index_file = plist.get("dashIndexFilePath")
+        if index_file:
+            index_path = self.documents_dir / index_file
             if index_path.exists():
-                self.success(f"Index file exists: {match.group(1)}")
+                self.success(f"Index file exists: {index_file}")
             else:
-                self.warning(f"Index file not found: {match.group(1)}")
+                self.warning(f"Index file not found: {index_file}")
 
     def _check_icons(self) -> None:
         """Check docset icons exist."""
@@ -165,8 +375,7 @@ class DocsetValidator:
             return
 
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self.inspector.db.cursor()
 
             # Check table exists
             cursor.execute(
@@ -175,14 +384,13 @@ class DocsetValidator:
             )
             if not cursor.fetchone():
                 self.error("searchIndex table not found")
-                conn.close()
                 return
 
             self.success("searchIndex table exists")
 
-            # Check entry count
-            cursor.execute("SELECT COUNT(*) FROM searchIndex")
-            count = cursor.fetchone()[0]
+            # Count entries and those whose path (minus its anchor) is missing on disk in one scan
+            cursor.execute("SELECT COUNT(*), COALESCE(SUM(NOT file_exists(path)), 0) FROM searchIndex")
+            count, missing_count = cursor.fetchone()
             if count == 0:
                 self.error("searchIndex is empty")
             elif count < MIN_EXPECTED_ENTRIES:
@@ -200,25 +408,12 @@ class DocsetValidator:
                 else:
                     self.warning(f"Missing entry type: {t}")
 
-            # Sample some entries to verify paths exist
-            cursor.execute("SELECT path FROM searchIndex ORDER BY RANDOM() LIMIT 10")
-            sample_paths = [row[0] for row in cursor.fetchall()]
-            missing_count = 0
-            for path in sample_paths:
-                # Strip anchor
-                file_path = path.split("#")[0]
-                full_path = self.documents_dir / file_path
-                if not full_path.exists():
-                    missing_count += 1
-
             if missing_count > 0:
                 self.warning(
-                    f"{missing_count}/10 sampled index paths point to missing files",
+                    f"{missing_count}/{count} index paths point to missing files",
                 )
             else:
-                self.success("Sampled index paths all exist")
-
-            conn.close()
+                self.success("All index paths exist")
 
         except sqlite3.Error as e:
             self.error(f"SQLite error: {e}")
@@ -227,7 +422,7 @@ class DocsetValidator:
         """Check for external resources that break offline viewing."""
         print("\n🌐 Checking for external resources...")
 
-        html_files = list(self.documents_dir.rglob("*.html"))
+        html_files = self.inspector.html_files
         if not html_files:
             return
 
@@ -235,20 +430,12 @@ class DocsetValidator:
         sample_size = min(50, len(html_files))
         sample_files = random.sample(html_files, sample_size)
 
-        # Patterns for external resources that should be removed or localized
-        external_patterns = [
-            (re.compile(r'href="https?://static-2v\.gitbook\.com[^"]*"', re.IGNORECASE), "External GitBook CSS (not localized)"),
-            (re.compile(r'<[^>]*ka-p\.fontawesome\.com[^>]*>', re.IGNORECASE), "FontAwesome"),
-            (re.compile(r'~gitbook/image', re.IGNORECASE), "GitBook image proxy"),
-            (re.compile(r'srcset="\s*\d+w', re.IGNORECASE), "Broken srcset (orphaned width descriptors)"),
-        ]
-
         files_with_external = []
 
         for html_file in sample_files:
             try:
-                content = html_file.read_text(encoding="utf-8", errors="ignore")
-                for pattern, desc in external_patterns:
+                content = html_file.read_bytes()
+                for pattern, desc in _EXTERNAL_PATTERNS:
                     if pattern.search(content):
                         rel_path = html_file.relative_to(self.documents_dir)
                         files_with_external.append((rel_path, desc))
@@ -267,7 +454,7 @@ class DocsetValidator:
             self.success("No external resources found (good for offline viewing)")
 
         # Check that CSS files exist for offline styling
-        css_files = list(self.documents_dir.rglob("*.css"))
+        css_files = [self.documents_dir / path for path in self.inspector.doc_files if path.endswith(".css")]
         if css_files:
             self.success(f"Found {len(css_files)} local CSS files")
 
@@ -275,8 +462,8 @@ class DocsetValidator:
             external_font_refs = 0
             for css_file in css_files:
                 try:
-                    content = css_file.read_text(encoding="utf-8", errors="ignore")
-                    if re.search(r'url\(["\']?https://static-2v\.gitbook\.com', content, re.IGNORECASE):
+                    content = css_file.read_bytes()
+                    if _CSS_EXTERNAL_FONT_RE.search(content):
                         external_font_refs += 1
                 except OSError:
                     pass
@@ -290,8 +477,8 @@ class DocsetValidator:
             has_css_refs = False
             for html_file in sample_files[:5]:
                 try:
-                    content = html_file.read_text(encoding="utf-8", errors="ignore")
-                    if re.search(r'<link[^>]*rel=["\']?stylesheet', content, re.IGNORECASE):
+                    content = html_file.read_bytes()
+                    if _STYLESHEET_LINK_RE.search(content):
                         has_css_refs = True
                         break
                 except OSError:
@@ -305,97 +492,32 @@ class DocsetValidator:
         """Check HTML files for unwanted content (tracking, cookies, etc.)."""
         print("\n🔗 Checking HTML content...")
 
-        html_files = list(self.documents_dir.rglob("*.html"))
+        html_files = self.inspector.html_files
         if not html_files:
             self.error("No HTML files found")
             return
 
         self.success(f"Found {len(html_files)} HTML files")
 
-        # Sample some HTML files to check for unwanted content
-        sample_size = min(20, len(html_files))
-        sample_files = random.sample(html_files, sample_size)
-
-        # Patterns that indicate unwanted content
-        unwanted_patterns = [
-            (r"googletagmanager\.com", "Google Tag Manager"),
-            (r"google-analytics\.com", "Google Analytics"),
-            (r"cdn\.cookielaw\.org", "Cookie consent (OneTrust)"),
-            (r"cookieconsent", "Cookie consent script"),
-            (r"gdpr|privacy.?consent", "GDPR/privacy consent"),
-        ]
-
-        found_issues: set[str] = set()
-        for html_file in sample_files:
-            try:
-                content = html_file.read_text(encoding="utf-8", errors="ignore")
-                for pattern, desc in unwanted_patterns:
-                    if re.search(pattern, content, re.IGNORECASE):
-                        found_issues.add(desc)
-            except OSError:
-                pass
+        scan = self._html_scan
 
-        for issue in found_issues:
+        for issue in scan.unwanted:
             self.warning(f"Found unwanted content: {issue}")
 
-        if not found_issues:
+        if not scan.unwanted:
             self.success("No tracking/cookie scripts detected")
 
         # Check for malformed HTML tags (e.g., <imgalt="..."> from bad attribute removal)
-        malformed_tags_found = 0
-        malformed_pattern = re.compile(r'<[a-z]+[a-z]+=', re.IGNORECASE)
-        for html_file in sample_files:
-            try:
-                content = html_file.read_text(encoding="utf-8", errors="ignore")
-                # Find tags where attribute name is directly joined to tag name
-                matches = malformed_pattern.findall(content)
-                # Filter out valid cases like <meta...> by checking for known malformed patterns
-                for match in matches:
-                    # Extract the "tag" part - if it's not a valid HTML tag, it's malformed
-                    tag_part = match[1:-1].split("=")[0]  # e.g., "imgalt" from "<imgalt="
-                    valid_tags = {
-                        "a", "abbr", "address", "area", "article", "aside", "audio",
-                        "b", "base", "bdi", "bdo", "blockquote", "body", "br", "button",
-                        "canvas", "caption", "cite", "code", "col", "colgroup",
-                        "data", "datalist", "dd", "del", "details", "dfn", "dialog", "div", "dl", "dt",
-                        "em", "embed", "fieldset", "figcaption", "figure", "footer", "form",
-                        "h1", "h2", "h3", "h4", "h5", "h6", "head", "header", "hgroup", "hr", "html",
-                        "i", "iframe", "img", "input", "ins", "kbd", "label", "legend", "li", "link",
-                        "main", "map", "mark", "menu", "meta", "meter", "nav", "noscript",
-                        "object", "ol", "optgroup", "option", "output", "p", "picture", "pre", "progress",
-                        "q", "rp", "rt", "ruby", "s", "samp", "script", "search", "section", "select",
-                        "slot", "small", "source", "span", "strong", "style", "sub", "summary", "sup",
-                        "table", "tbody", "td", "template", "textarea", "tfoot", "th", "thead", "time",
-                        "title", "tr", "track", "u", "ul", "var", "video", "wbr",
-                    }
-                    if tag_part.lower() not in valid_tags:
-                        malformed_tags_found += 1
-                        if self.verbose:
-                            rel_path = html_file.relative_to(self.documents_dir)
-                            self.warning(f"Malformed tag '{match}' in {rel_path}")
-                        break  # Only count once per file
-            except OSError:
-                pass
-
-        if malformed_tags_found > 0:
-            self.error(f"Found {malformed_tags_found} file(s) with malformed HTML tags (e.g., <imgalt=...>)")
+        if scan.malformed:
+            if self.verbose:
+                for rel_path, match in scan.malformed:
+                    self.warning(f"Malformed tag '{match}' in {rel_path}")
+            self.error(f"Found {len(scan.malformed)} file(s) with malformed HTML tags (e.g., <imgalt=...>)")
         else:
             self.success("No malformed HTML tags detected")
 
         # Check that header/nav/aside elements have been removed (broken links in offline docset)
-        nav_found = False
-        for html_file in sample_files[:3]:
-            try:
-                content = html_file.read_text(encoding="utf-8", errors="ignore")
-                if (re.search(r'<header[^>]*>', content) or
-                    re.search(r'<nav[^>]*>', content) or
-                    re.search(r'<aside[^>]*>', content)):
-                    nav_found = True
-                    break
-            except OSError:
-                pass
-
-        if nav_found:
+        if scan.nav_found:
             self.warning("Header/nav/aside elements found (should be removed for offline docset)")
         else:
             self.success("No header/nav/aside elements (clean offline display)")
@@ -404,72 +526,53 @@ class DocsetValidator:
         """Check that TOC anchors are properly formed and targets exist."""
         print("\n📑 Checking TOC anchors...")
 
-        html_files = list(self.documents_dir.rglob("*.html"))
+        html_files = self.inspector.html_files
         if not html_files:
             return
 
-        sample_size = min(10, len(html_files))
-        sample_files = random.sample(html_files, sample_size)
-
-        total_anchors = 0
-        anchors_outside_headings = 0
+        scan = self._html_scan
 
-        for html_file in sample_files:
-            try:
-                content = html_file.read_text(encoding="utf-8", errors="ignore")
-
-                # Count anchors
-                anchor_matches = re.findall(r'class="dashAnchor"', content)
-                total_anchors += len(anchor_matches)
-
-                # Check if anchors are inside headings (not before them)
-                # Good: <h2><a class="dashAnchor"...></a>Title</h2>
-                # Bad:  <a class="dashAnchor"...></a><h2>Title</h2>
-                # Match anchor tags with dashAnchor class followed by heading tags
-                bad_pattern = re.compile(
-                    r'<a\s[^>]*dashAnchor[^>]*>\s*</a>\s*<h[123]',
-                    re.IGNORECASE
-                )
-                bad_matches = bad_pattern.findall(content)
-                anchors_outside_headings += len(bad_matches)
-            except OSError:
-                pass
-
-        if total_anchors == 0:
+        if scan.anchor_count == 0:
             self.warning("No dashAnchor elements found in sampled files")
         else:
-            self.success(f"Found {total_anchors} TOC anchors in {sample_size} sampled files")
+            self.success(f"Found {scan.anchor_count} TOC anchors in {scan.sample_size} sampled files")
 
-        if anchors_outside_headings > 0:
+        if scan.bad_anchor_count > 0:
             self.warning(
-                f"{anchors_outside_headings} anchors placed before headings (should be inside)"
+                f"{scan.bad_anchor_count} anchors placed before headings (should be inside)"
             )
 
         # Check search index entries have valid anchor targets
         if self.db_path.exists():
             try:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT path FROM searchIndex WHERE path LIKE '%#%' "
-                    "ORDER BY RANDOM() LIMIT 10"
-                )
-                anchor_paths = cursor.fetchall()
-                conn.close()
-
-                missing_targets = 0
+                # Sample rowids of anchored entries, then look up just those rows,
+                # rather than sorting the whole index with ORDER BY RANDOM()
+                rowids = [
+                    row[0]
+                    for row in self.inspector.db.execute("SELECT rowid FROM searchIndex WHERE instr(path, '#') > 0")
+                ]
+                sample_ids = random.sample(rowids, min(10, len(rowids)))
+                placeholders = ",".join("?" * len(sample_ids))
+                anchor_paths = self.inspector.db.execute(
+                    f"SELECT path FROM searchIndex WHERE rowid IN ({placeholders})",
+                    sample_ids,
+                ).fetchall()
+
+                anchors_by_file: defaultdict[str, list[str]] = defaultdict(list)
                 for (path,) in anchor_paths:
                     file_path, anchor = path.split("#", 1)
-                    full_path = self.documents_dir / file_path
-                    if full_path.exists():
-                        content = full_path.read_text(encoding="utf-8", errors="ignore")
-                        # Check if the anchor ID exists in the file
-                        if f'id="{anchor}"' not in content and f"id='{anchor}'" not in content:
-                            missing_targets += 1
+                    anchors_by_file[file_path].append(anchor)
+
+                # Collect each target file's ids in one pass, then check its anchors against them
+                missing_targets = 0
+                for file_path, anchors in anchors_by_file.items():
+                    if file_path in self.inspector.doc_files:
+                        ids = set(_ID_RE.findall((self.documents_dir / file_path).read_bytes()))
+                        missing_targets += sum(1 for anchor in anchors if anchor.encode() not in ids)
 
                 if missing_targets > 0:
                     self.warning(
-                        f"{missing_targets}/10 sampled TOC entries point to missing anchors"
+                        f"{missing_targets}/{len(anchor_paths)} sampled TOC entries point to missing anchors"
                     )
                 elif anchor_paths:
                     self.success("Sampled TOC anchor targets exist")
@@ -494,13 +597,29 @@ def main() -> int:
         action="store_true",
         help="Treat warnings as errors",
     )
+    parser.add_argument(
+        "--contribution",
+        action="store_true",
+        help="Also check the Dash contribution requirements",
+    )
 
     args = parser.parse_args()
 
-    validator = DocsetValidator(args.docset, verbose=args.verbose)
-    passed = validator.validate()
-
-    if args.strict and validator.warnings:
+    # Both validators read the same facts, so gather them only once
+    inspector = DocsetInspector(args.docset)
+    try:
+        validator = DocsetValidator(args.docset, verbose=args.verbose, inspector=inspector)
+        passed = validator.validate()
+        warnings = list(validator.warnings)
+
+        if args.contribution:
+            checker = ContributionChecker(args.docset, verbose=args.verbose, inspector=inspector)
+            passed = checker.validate() and passed
+            warnings.extend(checker.warnings)
+    finally:
+        inspector.close()
+
+    if args.strict and warnings:
         return 1
 
     return 0 if passed else 1
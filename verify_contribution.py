@@ -5,51 +5,60 @@ Based on: https://github.com/Kapeli/Dash-User-Contributions/wiki/Docset-Contribu
 """
 
 import argparse
-import plistlib
 import re
 import sqlite3
 import sys
 from pathlib import Path
 
+from docset_inspect import DocsetInspector
+
+# Version numbers like "1.34", which must not appear in the bundle name
+_VERSION_RE = re.compile(r"\d+\.\d+")
+
 
 class ContributionChecker:
     """Check docset against Dash contribution requirements."""
 
-    def __init__(self, docset_path: Path, verbose: bool = False):
+    def __init__(self, docset_path: Path, verbose: bool = False, inspector: DocsetInspector | None = None):
         self.docset_path = docset_path
         self.verbose = verbose
         self.errors: list[str] = []
         self.warnings: list[str] = []
         self.passed: list[str] = []
+        self._log: list[str] = []
+
+        # A shared inspector is left open for the caller to close
+        self._owns_inspector = inspector is None
+        self.inspector = inspector or DocsetInspector(docset_path)
 
-        self.contents_dir = docset_path / "Contents"
-        self.resources_dir = self.contents_dir / "Resources"
-        self.documents_dir = self.resources_dir / "Documents"
-        self.plist_path = self.contents_dir / "Info.plist"
-        self.db_path = self.resources_dir / "docSet.dsidx"
+        self.contents_dir = self.inspector.contents_dir
+        self.resources_dir = self.inspector.resources_dir
+        self.documents_dir = self.inspector.documents_dir
+        self.plist_path = self.inspector.plist_path
+        self.db_path = self.inspector.db_path
 
     def error(self, msg: str) -> None:
         self.errors.append(msg)
         if self.verbose:
-            print(f"  ❌ {msg}")
+            self._log.append(f"  ❌ {msg}")
 
     def warning(self, msg: str) -> None:
         self.warnings.append(msg)
         if self.verbose:
-            print(f"  ⚠️  {msg}")
+            self._log.append(f"  ⚠️  {msg}")
 
     def success(self, msg: str) -> None:
         self.passed.append(msg)
         if self.verbose:
-            print(f"  ✅ {msg}")
+            self._log.append(f"  ✅ {msg}")
 
-    def check_structure(self) -> None:
-        """Check basic docset structure exists."""
+    def check_structure(self) -> bool:
+        """Check basic docset structure exists. Returns False if the docset is missing."""
         print("\n📁 Checking docset structure...")
 
         if not self.docset_path.exists():
             self.error(f"Docset not found: {self.docset_path}")
-            return
+            return False
 
         if not self.docset_path.suffix == ".docset":
             self.error("Docset must have .docset extension")
@@ -70,6 +79,8 @@ class ContributionChecker:
         else:
             self.error("Missing docSet.dsidx")
 
+        return True
+
     def check_plist(self) -> None:
         """Check Info.plist requirements."""
         print("\n📋 Checking Info.plist...")
@@ -77,8 +88,7 @@ class ContributionChecker:
         if not self.plist_path.exists():
             return
 
-        with open(self.plist_path, "rb") as f:
-            plist = plistlib.load(f)
+        plist = self.inspector.plist
 
         # Required keys
         required_keys = ["CFBundleIdentifier", "CFBundleName", "DocSetPlatformFamily", "isDashDocset"]
@@ -90,7 +100,7 @@ class ContributionChecker:
 
         # Check no version in bundle name (requirement)
         bundle_name = plist.get("CFBundleName", "")
-        if re.search(r"\d+\.\d+", bundle_name):
+        if _VERSION_RE.search(bundle_name):
             self.warning(f"Bundle name should not contain version: {bundle_name}")
         else:
             self.success("Bundle name has no version number")
@@ -136,58 +146,65 @@ class ContributionChecker:
             return
 
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            # Gather every integrity count in a single pass over the index; broken
+            # paths are checked (anchors removed) against the files on disk
+            count, empty_count, newline_count, broken_paths = self.inspector.db.execute(
+                "SELECT COUNT(*), "
+                "COALESCE(SUM(name IS NULL OR name = ''), 0), "
+                "COALESCE(SUM(instr(name, char(10)) > 0), 0), "
+                "COALESCE(SUM(NOT file_exists(path)), 0) "
+                "FROM searchIndex"
+            ).fetchone()
 
             # Check for empty entries
-            cursor.execute("SELECT COUNT(*) FROM searchIndex WHERE name = '' OR name IS NULL")
-            empty_count = cursor.fetchone()[0]
             if empty_count > 0:
                 self.error(f"Index contains {empty_count} empty entries")
             else:
                 self.success("No empty entries in index")
 
             # Check for entries with newlines
-            cursor.execute("SELECT COUNT(*) FROM searchIndex WHERE name LIKE '%\n%'")
-            newline_count = cursor.fetchone()[0]
             if newline_count > 0:
                 self.error(f"Index contains {newline_count} entries with newlines")
             else:
                 self.success("No entries with newlines")
 
-            # Check for broken paths (sample)
-            cursor.execute("SELECT path FROM searchIndex ORDER BY RANDOM() LIMIT 20")
-            paths = cursor.fetchall()
-            broken_paths = 0
-            for (path,) in paths:
-                file_path = path.split("#")[0]  # Remove anchor
-                full_path = self.documents_dir / file_path
-                if not full_path.exists():
-                    broken_paths += 1
-
             if broken_paths > 0:
-                self.error(f"{broken_paths}/20 sampled index paths are broken")
+                self.error(f"{broken_paths}/{count} index paths are broken")
             else:
-                self.success("All sampled index paths exist")
+                self.success("All index paths exist")
 
-            # Get entry count
-            cursor.execute("SELECT COUNT(*) FROM searchIndex")
-            count = cursor.fetchone()[0]
             self.success(f"Index has {count} entries")
-
-            conn.close()
         except sqlite3.Error as e:
             self.error(f"Database error: {e}")
 
+    def _flush_log(self) -> None:
+        """Write the verbose messages buffered by a check in one go."""
+        if self._log:
+            sys.stdout.write("\n".join(self._log) + "\n")
+            self._log.clear()
+
     def validate(self) -> bool:
         """Run all checks and return True if all required checks pass."""
         print(f"Validating docset for Dash contribution: {self.docset_path}")
         print("=" * 60)
 
-        self.check_structure()
-        self.check_plist()
-        self.check_icons()
-        self.check_index()
+        try:
+            docset_found = self.check_structure()
+            self._flush_log()
+            # Every other check would fail on a missing docset, so skip them
+            if docset_found:
+                for check in (
+                    self.check_plist,
+                    self.check_icons,
+                    self.check_index,
+                ):
+                    check()
+                    self._flush_log()
+        finally:
+            # Messages from a check that raised still reach the output
+            self._flush_log()
+            if self._owns_inspector:
+                self.inspector.close()
 
         print("\n" + "=" * 60)
 